@@ -1,23 +1,459 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request
+from flask_compress import Compress
+import brotli
+import gzip
+import zlib
 import sqlite3
 import os
+import re
+import time
+import orjson
+import atexit
+import sys
+import queue
+import threading
+import functools
+import hashlib
+from contextlib import contextmanager
+from urllib.request import pathname2url
 
 app = Flask(__name__)
 
+# Compress JSON/HTML responses; brotli level 4 keeps CPU cost close to gzip, and
+# bodies under 1 KB are sent as-is
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+app.config['COMPRESS_BR_LEVEL'] = 4
+app.config['COMPRESS_MIN_SIZE'] = 1024
+# Flask-Compress buffers streamed bodies to compress them; cached() compresses
+# streams chunk by chunk instead
+app.config['COMPRESS_STREAMS'] = False
+app.config['COMPRESS_MIMETYPES'] = ['application/json', 'text/html']
+Compress(app)
+
 # Database configuration
 DATABASE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data.db')
 
-def get_db_connection():
-    """Get database connection"""
-    conn = sqlite3.connect(DATABASE_PATH)
-    conn.row_factory = sqlite3.Row
+def database_uri(path):
+    """Read-only SQLite URI for a database file"""
+    return f"file:{pathname2url(os.path.abspath(path))}?mode=ro"
+
+DATABASE_URI = database_uri(DATABASE_PATH)
+
+# Idle read-only connections shared by all request threads, see borrow()
+DB_POOL_SIZE = 8
+_pool = queue.Queue(maxsize=DB_POOL_SIZE)
+
+# Key health measures shared by the health score and the ZIP/county health lookups
+KEY_HEALTH_MEASURES = """
+    'Violent crime rate',
+    'Unemployment', 
+    'Children in poverty',
+    'Adult obesity',
+    'Physical inactivity',
+    'Uninsured',
+    'Preventable hospital stays'
+"""
+
+# Flags actual county rows (not the United States / state summary rows) so county
+# filters are an indexed equality check instead of a LIKE scan. It is a VIRTUAL
+# generated column, so PRAGMA table_info still reports only the CSV columns.
+IS_COUNTY_ROW_COLUMN = """
+    ALTER TABLE county_health_rankings ADD COLUMN is_county_row INTEGER
+    GENERATED ALWAYS AS (County LIKE '%County%' AND County != 'United States' AND County != State) VIRTUAL
+"""
+
+# Full-text index over zip_county for /api/search, built from the table's own rows
+ZIP_COUNTY_FTS_TABLE = """
+    CREATE VIRTUAL TABLE zip_county_fts USING fts5(
+        county, state_abbreviation, content='zip_county', tokenize='unicode61'
+    )
+"""
+
+# Trigram index over the searchable zip_county columns; FTS5 answers '%q%' LIKE
+# patterns of three or more characters from it instead of scanning the table
+ZIP_COUNTY_TRIGRAM_TABLE = """
+    CREATE VIRTUAL TABLE zip_county_trigram USING fts5(
+        zip, county, default_city, content='zip_county', tokenize='trigram'
+    )
+"""
+
+# Derived schema the endpoints rely on, built ahead of time by apply_schema().
+# The indexes back the WHERE / GROUP BY / JOIN columns used below;
+# idx_chr_filter covers the health measure lookups so they never touch the table.
+# v_county_health_score holds the health score (0-100, higher is better) of every
+# County/State, using the row set with a fipscode and the most measures.
+SCHEMA_STATEMENTS = [
+    "CREATE INDEX IF NOT EXISTS idx_zc_state ON zip_county(state_abbreviation)",
+    "CREATE INDEX IF NOT EXISTS idx_zc_county_state ON zip_county(county, state_abbreviation)",
+    "CREATE INDEX IF NOT EXISTS idx_zc_zip ON zip_county(zip)",
+    "CREATE INDEX IF NOT EXISTS idx_zc_city ON zip_county(default_city)",
+    "CREATE INDEX IF NOT EXISTS idx_chr_county_state ON county_health_rankings(County, State)",
+    "CREATE INDEX IF NOT EXISTS idx_chr_state ON county_health_rankings(State)",
+    "CREATE INDEX IF NOT EXISTS idx_chr_filter ON county_health_rankings(County, State, Measure_name, Raw_value, Data_Release_Year)",
+    "CREATE INDEX IF NOT EXISTS idx_chr_is_county ON county_health_rankings(is_county_row, Measure_name)",
+    """
+    CREATE VIEW IF NOT EXISTS v_county_health_score AS
+    WITH county_health_scores AS (
+        SELECT 
+            County,
+            State,
+            fipscode,
+            is_county_row,
+            COUNT(*) as measure_count,
+            AVG(CASE 
+                WHEN Measure_name = 'Adult obesity' THEN CAST(Raw_value AS REAL) * 100
+                WHEN Measure_name = 'Physical inactivity' THEN CAST(Raw_value AS REAL) * 100
+                WHEN Measure_name = 'Children in poverty' THEN CAST(Raw_value AS REAL) * 100
+                WHEN Measure_name = 'Unemployment' THEN CAST(Raw_value AS REAL) * 100
+                WHEN Measure_name = 'Uninsured' THEN CAST(Raw_value AS REAL) * 100
+                WHEN Measure_name = 'Violent crime rate' THEN CAST(Raw_value AS REAL) / 10
+                WHEN Measure_name = 'Preventable hospital stays' THEN CAST(Raw_value AS REAL) / 100
+                ELSE 0
+            END) as avg_penalty
+        FROM county_health_rankings
+        WHERE Measure_name IN ({key_health_measures})
+        AND Raw_value IS NOT NULL 
+        AND Raw_value != ''
+        GROUP BY County, State, fipscode, is_county_row
+    ),
+    ranked_counties AS (
+        SELECT 
+            County,
+            State,
+            fipscode,
+            is_county_row,
+            measure_count,
+            avg_penalty,
+            ROW_NUMBER() OVER (PARTITION BY County, State, is_county_row ORDER BY 
+                CASE WHEN fipscode IS NOT NULL AND fipscode != '' THEN 0 ELSE 1 END,
+                measure_count DESC
+            ) as rn
+        FROM county_health_scores
+    )
+    SELECT 
+        County,
+        State,
+        fipscode,
+        is_county_row,
+        measure_count,
+        CASE 
+            WHEN avg_penalty IS NULL THEN 0
+            ELSE MAX(0, 100 - avg_penalty)
+        END as health_score
+    FROM ranked_counties
+    WHERE rn = 1
+    """.format(key_health_measures=KEY_HEALTH_MEASURES),
+]
+
+# The health data is static, so v_county_health_score is materialized once into
+# county_health_score and the endpoints page through that small indexed table.
+HEALTH_SCORE_TABLE_STATEMENTS = [
+    "CREATE TABLE county_health_score AS SELECT * FROM v_county_health_score",
+    "CREATE INDEX idx_chs_score ON county_health_score(is_county_row, health_score, County, State)",
+    "CREATE INDEX idx_chs_county_state ON county_health_score(County, State)",
+]
+
+# The /api/location/analytics aggregates, materialized once for the same reason
+ANALYTICS_TABLE_STATEMENTS = {
+    'analytics_state_distribution': [
+        """
+        CREATE TABLE analytics_state_distribution AS
+        SELECT 
+            state_abbreviation as state,
+            COUNT(DISTINCT county) as county_count,
+            COUNT(zip) as zip_count,
+            COUNT(DISTINCT default_city) as city_count
+        FROM zip_county
+        WHERE state_abbreviation != '' AND county != ''
+        GROUP BY state_abbreviation
+        """,
+    ],
+    'analytics_city_summary': [
+        """
+        CREATE TABLE analytics_city_summary AS
+        SELECT 
+            default_city as city,
+            COUNT(DISTINCT county || ', ' || state_abbreviation) as county_count,
+            COUNT(DISTINCT state_abbreviation) as state_count,
+            COUNT(zip) as zip_count
+        FROM zip_county
+        WHERE default_city IS NOT NULL AND default_city != ''
+        AND county != '' AND state_abbreviation != ''
+        GROUP BY default_city
+        """,
+        "CREATE INDEX idx_acs_zip_count ON analytics_city_summary(zip_count)",
+    ],
+    'analytics_health_by_state': [
+        """
+        CREATE TABLE analytics_health_by_state AS
+        SELECT 
+            State as state,
+            COUNT(DISTINCT County) as county_count,
+            COUNT(*) as health_records
+        FROM county_health_rankings
+        WHERE is_county_row = 1
+        GROUP BY State
+        """,
+    ],
+}
+
+# Tables apply_schema() creates; startup only checks that they exist
+DERIVED_TABLES = ('zip_county_fts', 'zip_county_trigram', 'county_health_score', *ANALYTICS_TABLE_STATEMENTS)
+
+def apply_schema(path):
+    """Build the derived schema in the database at path.
+
+    Run once after loading the CSVs (`make prepare-db`) and commit the result; the
+    deployed database is read-only, so the app never writes to it.
+    """
+    conn = sqlite3.connect(path)
+    try:
+        columns = [col[1] for col in conn.execute("PRAGMA table_xinfo(county_health_rankings)")]
+        if 'is_county_row' not in columns:
+            conn.execute(IS_COUNTY_ROW_COLUMN)
+        tables = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")]
+        if 'zip_county_fts' not in tables:
+            conn.execute(ZIP_COUNTY_FTS_TABLE)
+            conn.execute("INSERT INTO zip_county_fts(zip_county_fts) VALUES('rebuild')")
+        if 'zip_county_trigram' not in tables:
+            conn.execute(ZIP_COUNTY_TRIGRAM_TABLE)
+            conn.execute("INSERT INTO zip_county_trigram(zip_county_trigram) VALUES('rebuild')")
+        for statement in SCHEMA_STATEMENTS:
+            conn.execute(statement)
+        if 'county_health_score' not in tables:
+            for statement in HEALTH_SCORE_TABLE_STATEMENTS:
+                conn.execute(statement)
+        for table, statements in ANALYTICS_TABLE_STATEMENTS.items():
+            if table not in tables:
+                for statement in statements:
+                    conn.execute(statement)
+        # Collect index statistics once so the planner can choose between the indexes
+        if 'sqlite_stat1' not in tables:
+            conn.execute("ANALYZE")
+        conn.commit()
+        # WAL is deliberately not kept: the deployed file is only ever opened read-only,
+        # and a rollback journal keeps it self-contained (no -wal/-shm to commit)
+        conn.execute("PRAGMA journal_mode=DELETE")
+    finally:
+        conn.close()
+
+def schema_ready():
+    """Whether the database has the derived schema built by apply_schema()"""
+    if not os.path.exists(DATABASE_PATH):
+        return False
+    conn = sqlite3.connect(DATABASE_URI, uri=True)
+    try:
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    finally:
+        conn.close()
+    return tables.issuperset(DERIVED_TABLES)
+
+def open_db_connection():
+    """Open a configured read-only database connection"""
+    conn = sqlite3.connect(
+        DATABASE_URI, uri=True, check_same_thread=False, isolation_level=None, cached_statements=256
+    )
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-131072")
+    conn.execute("PRAGMA mmap_size=1073741824")
     return conn
 
-def get_zip_column_name(cursor):
-    """Get the correct ZIP column name (zip or col__zip) for compatibility"""
-    cursor.execute("PRAGMA table_info(zip_county)")
-    columns = [col[1] for col in cursor.fetchall()]
-    return 'zip' if 'zip' in columns else 'col__zip'
+@contextmanager
+def borrow():
+    """Borrow a pooled database connection for the duration of a request.
+
+    Connections stay open between requests so SQLite's page cache and statement
+    cache stay warm; callers must not close them. When every pooled connection is
+    busy a new one is opened, and closed on return if the pool is already full.
+    """
+    try:
+        conn = _pool.get_nowait()
+    except queue.Empty:
+        conn = open_db_connection()
+    try:
+        yield conn
+    finally:
+        try:
+            _pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+def fill_db_pool():
+    """Open the pooled connections up front so first requests skip the connect"""
+    while not _pool.full():
+        _pool.put_nowait(open_db_connection())
+
+def close_db_pool():
+    """Close every idle pooled connection"""
+    while True:
+        try:
+            _pool.get_nowait().close()
+        except queue.Empty:
+            break
+
+atexit.register(close_db_pool)
+
+def ojsonify(payload, status=200):
+    """Serialize payload with orjson into a JSON response (drop-in for jsonify)"""
+    return app.response_class(orjson.dumps(payload), status=status, mimetype='application/json')
+
+# In-process response cache for the read-only endpoints, see cached()
+CACHE_TTLS = {'short': 10, 'normal': 60, 'long': 3600}  # seconds
+CACHE_MAX_BYTES = 32 * 1024 * 1024  # per process, bodies plus their compressed copies
+CACHE_MAX_ENTRY_BYTES = 2 * 1024 * 1024  # larger bodies are rebuilt on every request
+_response_cache = {}
+_response_cache_usage = {'bytes': 0}
+_response_cache_lock = threading.Lock()
+
+def cache_entry_size(entry):
+    """Bytes held by a cache entry: its body and every compressed copy"""
+    return len(entry[1]) + sum(len(data) for data in entry[4].values())
+
+def cache_make_room(size):
+    """Drop expired entries, then the oldest ones, until size more bytes fit.
+
+    Must be called with _response_cache_lock held.
+    """
+    now = time.time()
+    for key in [key for key, entry in _response_cache.items() if entry[0] <= now]:
+        _response_cache_usage['bytes'] -= cache_entry_size(_response_cache.pop(key))
+    while _response_cache and _response_cache_usage['bytes'] + size > CACHE_MAX_BYTES:
+        _response_cache_usage['bytes'] -= cache_entry_size(_response_cache.pop(next(iter(_response_cache))))
+
+def compress_body(body, encoding):
+    """Compress a response body the way Flask-Compress would for this encoding"""
+    if encoding == 'br':
+        return brotli.compress(body, quality=app.config['COMPRESS_BR_LEVEL'])
+    return gzip.compress(body, compresslevel=app.config['COMPRESS_LEVEL'])
+
+# Input bytes between compressor flushes, so a stream reaches the client steadily
+STREAM_FLUSH_BYTES = 64 * 1024
+
+def compress_chunks(chunks, encoding):
+    """Compress a streamed body chunk by chunk for this encoding"""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=app.config['COMPRESS_BR_LEVEL'])
+        compress, flush, finish = compressor.process, compressor.flush, compressor.finish
+    else:
+        compressor = zlib.compressobj(app.config['COMPRESS_LEVEL'], zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        compress, finish = compressor.compress, compressor.flush
+        flush = functools.partial(compressor.flush, zlib.Z_SYNC_FLUSH)
+    pending = 0
+    for chunk in chunks:
+        data = compress(chunk)
+        pending += len(chunk)
+        if pending >= STREAM_FLUSH_BYTES:
+            data += flush()
+            pending = 0
+        if data:
+            yield data
+    yield finish()
+
+def cached(policy='normal', query_args=()):
+    """Serve a view's successful responses from memory for the policy's TTL.
+
+    Entries are keyed by path and the query arguments the view reads (query_args), so
+    unrelated arguments such as cache busters share one entry. Expired entries are
+    dropped on lookup and insert, and the oldest are evicted once the cache holds
+    CACHE_MAX_BYTES. The data only changes on redeploy, so nothing is invalidated.
+    Each body gets an ETag when it is cached, and a client that sends it back in
+    If-None-Match gets an empty 304 instead of the body. Compressed copies are
+    kept alongside the body, so hits skip Flask-Compress. Streamed responses are
+    compressed and sent as they are produced, and cached once complete unless
+    they outgrow CACHE_MAX_ENTRY_BYTES.
+    """
+    ttl = CACHE_TTLS[policy]
+    cache_control = f'public, max-age={ttl}, stale-while-revalidate=60'
+    def remember(key, body, mimetype):
+        entry = (time.time() + ttl, body, mimetype, hashlib.blake2b(body, digest_size=16).hexdigest(), {})
+        if len(body) <= CACHE_MAX_ENTRY_BYTES:
+            with _response_cache_lock:
+                old = _response_cache.pop(key, None)
+                if old is not None:
+                    _response_cache_usage['bytes'] -= cache_entry_size(old)
+                cache_make_room(len(body))
+                _response_cache[key] = entry
+                _response_cache_usage['bytes'] += len(body)
+        return entry
+    def remember_encoded(key, entry, encoding, data):
+        with _response_cache_lock:
+            cache_make_room(len(data))
+            if _response_cache.get(key) is entry and encoding not in entry[4]:
+                entry[4][encoding] = data
+                _response_cache_usage['bytes'] += len(data)
+    def remember_stream(key, chunks, mimetype):
+        parts, size = [], 0
+        for chunk in chunks:
+            yield chunk
+            if parts is not None:
+                size += len(chunk)
+                if size > CACHE_MAX_ENTRY_BYTES:
+                    parts = None
+                else:
+                    parts.append(chunk)
+        if parts is not None:
+            remember(key, b''.join(parts), mimetype)
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            key = (request.path, *(request.args.get(name) for name in query_args))
+            entry = _response_cache.get(key)
+            if entry is not None and entry[0] <= time.time():
+                with _response_cache_lock:
+                    if _response_cache.get(key) is entry:
+                        del _response_cache[key]
+                        _response_cache_usage['bytes'] -= cache_entry_size(entry)
+                entry = None
+            if entry is None:
+                response = app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                if response.is_streamed:
+                    chunks = remember_stream(key, response.response, response.mimetype)
+                    encoding = None
+                    if response.mimetype in app.config['COMPRESS_MIMETYPES']:
+                        encoding = request.accept_encodings.best_match(app.config['COMPRESS_ALGORITHM'])
+                    if encoding is not None:
+                        chunks = compress_chunks(chunks, encoding)
+                        response.headers['Content-Encoding'] = encoding
+                    response.response = chunks
+                    response.headers['Cache-Control'] = cache_control
+                    return response
+                entry = remember(key, response.get_data(), response.mimetype)
+            _, body, mimetype, etag, encoded = entry
+            encoding = None
+            if len(body) >= app.config['COMPRESS_MIN_SIZE']:
+                encoding = request.accept_encodings.best_match(app.config['COMPRESS_ALGORITHM'])
+            # Compressed bodies are tagged "<etag>:<encoding>", as Flask-Compress does;
+            # If-None-Match matches weakly and "*" matches any tag
+            tag = etag if encoding is None else f'{etag}:{encoding}'
+            if request.if_none_match.contains_weak(tag):
+                response = app.response_class(status=304)
+            elif encoding is None:
+                response = app.response_class(body, mimetype=mimetype)
+            else:
+                data = encoded.get(encoding)
+                if data is None:
+                    data = compress_body(body, encoding)
+                    remember_encoded(key, entry, encoding, data)
+                response = app.response_class(data, mimetype=mimetype)
+                response.headers['Content-Encoding'] = encoding
+            response.set_etag(tag)
+            response.headers['Cache-Control'] = cache_control
+            return response
+        return wrapper
+    return decorator
+
+# State filters are checked against this before any query is built; anything else
+# cannot match a row and never reaches SQLite. County names are only ever bound
+# to = comparisons, so they are passed through as-is.
+_STATE_CODE = re.compile(r'[A-Z]{2}')
+
+SCHEMA_READY = schema_ready()
+if os.path.exists(DATABASE_PATH) and not SCHEMA_READY:
+    print("data.db is missing the derived schema; run `make prepare-db`", file=sys.stderr)
+if os.path.exists(DATABASE_PATH):
+    fill_db_pool()
 
 
 @app.route('/')
@@ -28,6 +464,34 @@ def index():
 # COUNTY DATA API ENDPOINTS
 # =============================================================================
 
+_Q_POST_ZIP = """
+    SELECT county, state_abbreviation 
+    FROM zip_county 
+    WHERE zip = ?
+    LIMIT 1
+    """
+
+_Q_POST_HEALTH = """
+        SELECT 
+            State as state,
+            County as county,
+            State_code as state_code,
+            County_code as county_code,
+            Year_span as year_span,
+            Measure_name as measure_name,
+            Measure_id as measure_id,
+            Numerator as numerator,
+            Denominator as denominator,
+            Raw_value as raw_value,
+            Confidence_Interval_Lower_Bound as confidence_interval_lower_bound,
+            Confidence_Interval_Upper_Bound as confidence_interval_upper_bound,
+            Data_Release_Year as data_release_year,
+            fipscode as fipscode
+        FROM county_health_rankings
+        WHERE County = ? AND State = ? AND Measure_name = ?
+        ORDER BY Data_Release_Year DESC, Year_span DESC
+    """
+
 @app.route('/county_data', methods=['POST'])
 def county_data_post():
     """
@@ -40,22 +504,22 @@ def county_data_post():
         if request.is_json:
             data = request.get_json()
             if data and 'coffee' in data and data['coffee'] == 'teapot':
-                return jsonify({'error': 'I\'m a teapot'}), 418
+                return ojsonify({'error': 'I\'m a teapot'}, 418)
         
         # Get JSON data
         if not request.is_json:
-            return jsonify({'error': 'Content-Type must be application/json'}), 400
+            return ojsonify({'error': 'Content-Type must be application/json'}, 400)
         
         data = request.get_json()
         if not data:
-            return jsonify({'error': 'Invalid JSON'}), 400
+            return ojsonify({'error': 'Invalid JSON'}, 400)
         
         # Check for required fields
         zip_code = data.get('zip')
         measure_name = data.get('measure_name')
         
         if not zip_code or not measure_name:
-            return jsonify({'error': 'Missing required fields: zip and measure_name'}), 400
+            return ojsonify({'error': 'Missing required fields: zip and measure_name'}, 400)
         
         # Validate measure_name is one of the allowed values
         allowed_measures = [
@@ -74,531 +538,437 @@ def county_data_post():
         ]
         
         if measure_name not in allowed_measures:
-            return jsonify({'error': 'Invalid measure_name'}), 400
+            return ojsonify({'error': 'Invalid measure_name'}, 400)
         
         # Connect to database
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # First, find the county and state for this ZIP code
-        # Check which column exists (zip or col__zip) for compatibility
-        cursor.execute("PRAGMA table_info(zip_county)")
-        columns = [col[1] for col in cursor.fetchall()]
-        zip_col = 'zip' if 'zip' in columns else 'col__zip'
-        
-        zip_query = f"""
-            SELECT county, state_abbreviation 
-            FROM zip_county 
-            WHERE {zip_col} = ?
-            LIMIT 1
-        """
-        zip_result = cursor.execute(zip_query, [zip_code]).fetchone()
-        
-        if not zip_result:
-            conn.close()
-            return jsonify({'error': 'ZIP code not found'}), 404
-        
-        county = zip_result['county']
-        state = zip_result['state_abbreviation']
-        
-        # Now query health rankings for this county and measure
-        health_query = """
-            SELECT 
-                State as state,
-                County as county,
-                State_code as state_code,
-                County_code as county_code,
-                Year_span as year_span,
-                Measure_name as measure_name,
-                Measure_id as measure_id,
-                Numerator as numerator,
-                Denominator as denominator,
-                Raw_value as raw_value,
-                Confidence_Interval_Lower_Bound as confidence_interval_lower_bound,
-                Confidence_Interval_Upper_Bound as confidence_interval_upper_bound,
-                Data_Release_Year as data_release_year,
-                fipscode as fipscode
-            FROM county_health_rankings
-            WHERE County = ? AND State = ? AND Measure_name = ?
-            ORDER BY Data_Release_Year DESC, Year_span DESC
-        """
-        
-        health_results = cursor.execute(health_query, [county, state, measure_name]).fetchall()
-        conn.close()
-        
-        if not health_results:
-            return jsonify({'error': 'No data found for this ZIP code and measure'}), 404
-        
-        # Convert to list of dictionaries
-        result = []
-        for row in health_results:
-            result.append({
-                'state': row['state'],
-                'county': row['county'],
-                'state_code': row['state_code'],
-                'county_code': row['county_code'],
-                'year_span': row['year_span'],
-                'measure_name': row['measure_name'],
-                'measure_id': row['measure_id'],
-                'numerator': row['numerator'],
-                'denominator': row['denominator'],
-                'raw_value': row['raw_value'],
-                'confidence_interval_lower_bound': row['confidence_interval_lower_bound'],
-                'confidence_interval_upper_bound': row['confidence_interval_upper_bound'],
-                'data_release_year': row['data_release_year'],
-                'fipscode': row['fipscode']
-            })
-        
-        return jsonify(result), 200
-        
+        with borrow() as conn:
+            cursor = conn.cursor()
+            
+            # First, find the county and state for this ZIP code
+            zip_result = cursor.execute(_Q_POST_ZIP, (zip_code,)).fetchone()
+            
+            if not zip_result:
+                return ojsonify({'error': 'ZIP code not found'}, 404)
+            
+            county, state = zip_result
+            
+            # Now query health rankings for this county and measure
+            health_results = cursor.execute(_Q_POST_HEALTH, (county, state, measure_name)).fetchall()
+            
+            if not health_results:
+                return ojsonify({'error': 'No data found for this ZIP code and measure'}, 404)
+            
+            # Convert to list of dictionaries; the column aliases are the response keys
+            keys = [col[0] for col in cursor.description]
+            result = [dict(zip(keys, row)) for row in health_results]
+            
+            return ojsonify(result)
+            
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return ojsonify({'error': str(e)}, 500)
+
+_Q_COUNTIES = """
+    SELECT 
+        z.county,
+        z.state_abbreviation as state,
+        z.default_city,
+        COUNT(z.zip) as zip_count
+    FROM zip_county z
+    WHERE z.county != '' AND z.state_abbreviation != ''
+    {state_filter}
+    GROUP BY z.county, z.state_abbreviation, z.default_city
+    ORDER BY z.county
+    LIMIT ?
+    """
+_Q_COUNTIES_ALL = _Q_COUNTIES.format(state_filter='')
+_Q_COUNTIES_BY_STATE = _Q_COUNTIES.format(state_filter='AND z.state_abbreviation = ?')
 
 @app.route('/api/county_data', methods=['GET'])
 def get_county_data():
     """Get all counties with basic information"""
     try:
-        conn = get_db_connection()
-        
         # Get query parameters
         state = request.args.get('state')
         limit = request.args.get('limit', type=int)
         
-        # Build query
-        query = """
-        SELECT DISTINCT 
-            z.county,
-            z.state_abbreviation as state,
-            z.default_city,
-            COUNT(z.zip) as zip_count
-        FROM zip_county z
-        WHERE z.county != '' AND z.state_abbreviation != ''
-        """
+        if limit is not None and limit < 1:
+            return ojsonify({'success': False, 'error': 'limit must be a positive integer'}, 400)
         
-        params = []
         if state:
-            query += " AND z.state_abbreviation = ?"
-            params.append(state)
-            
-        query += " GROUP BY z.county, z.state_abbreviation, z.default_city ORDER BY z.county"
-        
-        if limit:
-            query += " LIMIT ?"
-            params.append(limit)
-        
-        counties = conn.execute(query, params).fetchall()
-        conn.close()
+            state = state.upper()
+            if not _STATE_CODE.fullmatch(state):
+                return ojsonify({'success': True, 'count': 0, 'data': []})
         
-        result = []
-        for county in counties:
-            result.append({
-                'county': county['county'],
-                'state': county['state'],
-                'default_city': county['default_city'],
-                'zip_count': county['zip_count']
+        with borrow() as conn:
+            # A negative LIMIT returns every row
+            if state:
+                query, params = _Q_COUNTIES_BY_STATE, (state, limit or -1)
+            else:
+                query, params = _Q_COUNTIES_ALL, (limit or -1,)
+            
+            result = [
+                {'county': c, 'state': s, 'default_city': d, 'zip_count': z}
+                for c, s, d, z in conn.cursor().execute(query, params)
+            ]
+            
+            return ojsonify({
+                'success': True,
+                'count': len(result),
+                'data': result
             })
-        
-        return jsonify({
-            'success': True,
-            'count': len(result),
-            'data': result
-        })
-        
+            
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return ojsonify({'success': False, 'error': str(e)}, 500)
 
-@app.route('/api/county_data/<county_name>', methods=['GET'])
-def get_county_details(county_name):
-    """Get detailed information for a specific county"""
-    try:
-        conn = get_db_connection()
-        state = request.args.get('state')
-        
-        # Build query for county details
-        query = """
-        SELECT DISTINCT 
+# County summary and its first health record in one statement
+_Q_COUNTY_DETAILS = """
+    WITH c AS (
+        SELECT 
             z.county,
             z.state_abbreviation as state,
             z.default_city,
             COUNT(z.zip) as zip_count,
-            GROUP_CONCAT(DISTINCT z.zip) as zip_codes
+            json_group_array(DISTINCT z.zip) as zip_codes_json
         FROM zip_county z
         WHERE z.county = ?
-        """
-        
-        params = [county_name]
+        {state_filter}
+        GROUP BY z.county, z.state_abbreviation, z.default_city
+        LIMIT 1
+    )
+    SELECT 
+        c.county, c.state, c.default_city, c.zip_count, c.zip_codes_json,
+        h.State, h.County, h.State_code, h.County_code, h.Year_span, h.Measure_name, h.Measure_id,
+        h.Numerator, h.Denominator, h.Raw_value, h.Confidence_Interval_Lower_Bound,
+        h.Confidence_Interval_Upper_Bound, h.Data_Release_Year, h.fipscode
+    FROM c
+    LEFT JOIN county_health_rankings h ON h.County = c.county AND h.State = c.state
+    LIMIT 1
+    """
+_Q_COUNTY_DETAILS_ALL = _Q_COUNTY_DETAILS.format(state_filter='')
+_Q_COUNTY_DETAILS_IN_STATE = _Q_COUNTY_DETAILS.format(state_filter='AND z.state_abbreviation = ?')
+
+@app.route('/api/county_data/<county_name>', methods=['GET'])
+def get_county_details(county_name):
+    """Get detailed information for a specific county"""
+    try:
+        state = request.args.get('state')
         if state:
-            query += " AND z.state_abbreviation = ?"
-            params.append(state)
-            
-        query += " GROUP BY z.county, z.state_abbreviation, z.default_city"
-        
-        county = conn.execute(query, params).fetchone()
-        
-        if not county:
-            conn.close()
-            return jsonify({'success': False, 'error': 'County not found'}), 404
+            state = state.upper()
         
-        # Get health rankings for this county
-        health_query = """
-        SELECT * FROM county_health_rankings 
-        WHERE county = ? AND state = ?
-        """
-        health_data = conn.execute(health_query, [county['county'], county['state']]).fetchone()
-        
-        conn.close()
-        
-        result = {
-            'county': county['county'],
-            'state': county['state'],
-            'default_city': county['default_city'],
-            'zip_count': county['zip_count'],
-            'zip_codes': county['zip_codes'].split(',') if county['zip_codes'] else [],
-            'health_rankings': dict(health_data) if health_data else None
-        }
-        
-        return jsonify({
-            'success': True,
-            'data': result
-        })
+        if state and not _STATE_CODE.fullmatch(state):
+            return ojsonify({'success': False, 'error': 'County not found'}, 404)
         
+        with borrow() as conn:
+            if state:
+                query, params = _Q_COUNTY_DETAILS_IN_STATE, (county_name, state)
+            else:
+                query, params = _Q_COUNTY_DETAILS_ALL, (county_name,)
+            
+            cursor = conn.cursor()
+            row = cursor.execute(query, params).fetchone()
+            
+            if not row:
+                return ojsonify({'success': False, 'error': 'County not found'}, 404)
+            
+            # Columns 5.. are the joined health record, all NULL when the county has none
+            health_data = row[5:]
+            health_keys = [col[0] for col in cursor.description[5:]]
+            
+            result = {
+                'county': row[0],
+                'state': row[1],
+                'default_city': row[2],
+                'zip_count': row[3],
+                'zip_codes': orjson.loads(row[4]),
+                'health_rankings': dict(zip(health_keys, health_data)) if health_data[0] is not None else None
+            }
+            
+            return ojsonify({
+                'success': True,
+                'data': result
+            })
+            
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return ojsonify({'success': False, 'error': str(e)}, 500)
+
+# ZIP row joined to its county's key health measures; every row repeats the ZIP
+# columns and the measure columns are NULL when the county has no health data
+_Q_ZIP = """
+    WITH zc AS (
+        SELECT zip, county, state_abbreviation, default_city
+        FROM zip_county WHERE zip = ?
+        LIMIT 1
+    )
+    SELECT 
+        zc.zip,
+        zc.county,
+        zc.state_abbreviation,
+        zc.default_city,
+        h.Measure_name,
+        h.Raw_value,
+        h.Year_span,
+        h.Data_Release_Year
+    FROM zc
+    LEFT JOIN county_health_rankings h
+        ON h.County = zc.county AND h.State = zc.state_abbreviation
+        AND h.Measure_name IN ({key_health_measures})
+    ORDER BY h.Data_Release_Year DESC, h.Measure_name
+    LIMIT 5
+    """.format(key_health_measures=KEY_HEALTH_MEASURES)
 
 @app.route('/api/zip/<zip_code>', methods=['GET'])
 def get_zip_info(zip_code):
     """Get county information by ZIP code"""
     try:
-        conn = get_db_connection()
-        
-        # Get ZIP code info
-        zip_query = """
-        SELECT * FROM zip_county WHERE zip = ?
-        """
-        zip_data = conn.execute(zip_query, [zip_code]).fetchone()
-        
-        if not zip_data:
-            conn.close()
-            return jsonify({'success': False, 'error': 'ZIP code not found'}), 404
-        
-        # Get health rankings for the county - get key health measures
-        health_query = """
-        SELECT 
-            Measure_name,
-            Raw_value,
-            Year_span,
-            Data_Release_Year
-        FROM county_health_rankings 
-        WHERE County = ? AND State = ?
-        AND Measure_name IN (
-            'Violent crime rate',
-            'Unemployment', 
-            'Children in poverty',
-            'Adult obesity',
-            'Physical inactivity',
-            'Uninsured',
-            'Preventable hospital stays'
-        )
-        ORDER BY Data_Release_Year DESC, Measure_name
-        LIMIT 5
-        """
-        health_data = conn.execute(health_query, [zip_data['county'], zip_data['state']]).fetchall()
-        
-        conn.close()
-        
-        result = {
-            'zip_code': zip_data['zip'],
-            'county': zip_data['county'],
-            'state': zip_data['state_abbreviation'],
-            'default_city': zip_data['default_city'],
-            'health_rankings': [dict(health) for health in health_data] if health_data else []
-        }
-        
-        return jsonify({
-            'success': True,
-            'data': result
-        })
-        
-    except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
-
-def calculate_health_score(health_measures):
-    """Calculate a health score based on key health metrics (0-100, higher is better)"""
-    if not health_measures:
-        return 0
-    
-    score = 100  # Start with perfect score
-    weights = {
-        'Adult obesity': 0.20,
-        'Physical inactivity': 0.15,
-        'Children in poverty': 0.15,
-        'Unemployment': 0.10,
-        'Violent crime rate': 0.15,
-        'Uninsured': 0.10,
-        'Preventable hospital stays': 0.15
-    }
-    
-    for measure in health_measures:
-        measure_name = measure['Measure_name']
-        raw_value = measure['Raw_value']
-        
-        if not raw_value or raw_value == '':
-            continue
+        with borrow() as conn:
+            # Get ZIP code info and the county's key health measures together
+            cursor = conn.cursor()
+            rows = cursor.execute(_Q_ZIP, (zip_code,)).fetchall()
             
-        try:
-            value = float(raw_value)
-            weight = weights.get(measure_name, 0.1)
-            
-            # Penalize based on health metrics (lower is better for most)
-            if measure_name in ['Adult obesity', 'Physical inactivity', 'Children in poverty', 'Unemployment', 'Uninsured']:
-                # These are percentages, penalize more as they increase
-                penalty = value * 100  # Convert to percentage
-                score -= penalty * weight
-            elif measure_name == 'Violent crime rate':
-                # Crime rate per 100,000, penalize more as it increases
-                penalty = min(value / 10, 10)  # Cap penalty at 10 points
-                score -= penalty * weight
-            elif measure_name == 'Preventable hospital stays':
-                # Hospital stays per 100,000, penalize more as it increases
-                penalty = min(value / 100, 5)  # Cap penalty at 5 points
-                score -= penalty * weight
-                
-        except (ValueError, TypeError):
-            continue
-    
-    return max(0, min(100, round(score, 1)))  # Keep between 0-100
+            if not rows:
+                return ojsonify({'success': False, 'error': 'ZIP code not found'}, 404)
+            
+            zip_data = rows[0]
+            health_keys = [col[0] for col in cursor.description[4:]]
+            
+            result = {
+                'zip_code': zip_data[0],
+                'county': zip_data[1],
+                'state': zip_data[2],
+                'default_city': zip_data[3],
+                'health_rankings': [dict(zip(health_keys, row[4:])) for row in rows if row[4] is not None]
+            }
+            
+            return ojsonify({
+                'success': True,
+                'data': result
+            })
+            
+    except Exception as e:
+        return ojsonify({'success': False, 'error': str(e)}, 500)
+
+# Full key ordering keeps pages stable and lets the cursor resume exactly
+_RANKINGS_TEMPLATE = """
+    SELECT 
+        County,
+        State,
+        fipscode,
+        measure_count,
+        health_score
+        {total_count}
+    FROM county_health_score
+    WHERE is_county_row = 1
+    {conditions}
+    ORDER BY health_score DESC, County DESC, State DESC
+    LIMIT ? {offset}
+    """
+
+# Filter conditions keyed by (county given, state given)
+_RANKINGS_FILTERS = {
+    (False, False): "",
+    (True, False): "AND County = ?",
+    (False, True): "AND State = ?",
+    (True, True): "AND County = ? AND State = ?",
+}
+
+_Q_RANKINGS = {
+    filters: _RANKINGS_TEMPLATE.format(
+        total_count=", COUNT(*) OVER () as total_count", conditions=conditions, offset="OFFSET ?"
+    )
+    for filters, conditions in _RANKINGS_FILTERS.items()
+}
+
+# Keyset variant: seeks past the cursor on idx_chs_score instead of counting/skipping rows
+_Q_RANKINGS_AFTER_CURSOR = {
+    filters: _RANKINGS_TEMPLATE.format(
+        total_count="", conditions="AND (health_score, County, State) < (?, ?, ?) " + conditions, offset=""
+    )
+    for filters, conditions in _RANKINGS_FILTERS.items()
+}
+
+# Total for a page past the last row, which has no row to carry the window count
+_Q_RANKINGS_COUNT = {
+    filters: "SELECT COUNT(*) FROM county_health_score WHERE is_county_row = 1 {conditions}".format(
+        conditions=conditions
+    )
+    for filters, conditions in _RANKINGS_FILTERS.items()
+}
+
+def parse_rankings_cursor(cursor):
+    """Split a '<score>,<county>,<state>' cursor into its key values"""
+    score, rest = cursor.split(',', 1)
+    county, state = rest.rsplit(',', 1)
+    return [float(score), county, state]
+
+# Response bytes for the dashboard's default request (no filters, first page of 20)
+_rankings_default = {'body': None}
 
 @app.route('/api/health_rankings', methods=['GET'])
 def get_health_rankings():
     """Get health rankings data with pagination and optimization"""
     try:
-        conn = get_db_connection()
-        
         # Get query parameters
         county = request.args.get('county')
         state = request.args.get('state')
+        cursor = request.args.get('cursor')
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
         
-        # Limit per_page to prevent excessive load
-        per_page = min(per_page, 50)
-        
-        # Calculate offset
-        offset = (page - 1) * per_page
-        
-        # Build optimized query - get counties with pre-calculated health scores
-        query = """
-        WITH county_health_scores AS (
-            SELECT 
-                County,
-                State,
-                fipscode,
-                COUNT(*) as measure_count,
-                AVG(CASE 
-                    WHEN Measure_name = 'Adult obesity' THEN CAST(Raw_value AS REAL) * 100
-                    WHEN Measure_name = 'Physical inactivity' THEN CAST(Raw_value AS REAL) * 100
-                    WHEN Measure_name = 'Children in poverty' THEN CAST(Raw_value AS REAL) * 100
-                    WHEN Measure_name = 'Unemployment' THEN CAST(Raw_value AS REAL) * 100
-                    WHEN Measure_name = 'Uninsured' THEN CAST(Raw_value AS REAL) * 100
-                    WHEN Measure_name = 'Violent crime rate' THEN CAST(Raw_value AS REAL) / 10
-                    WHEN Measure_name = 'Preventable hospital stays' THEN CAST(Raw_value AS REAL) / 100
-                    ELSE 0
-                END) as avg_penalty
-            FROM county_health_rankings
-            WHERE County != 'United States' 
-            AND County != State
-            AND County LIKE '%County%'
-            AND Measure_name IN (
-                'Violent crime rate',
-                'Unemployment', 
-                'Children in poverty',
-                'Adult obesity',
-                'Physical inactivity',
-                'Uninsured',
-                'Preventable hospital stays'
-            )
-            AND Raw_value IS NOT NULL 
-            AND Raw_value != ''
-            GROUP BY County, State, fipscode
-        ),
-        ranked_counties AS (
-            SELECT 
-                County,
-                State,
-                fipscode,
-                measure_count,
-                avg_penalty,
-                ROW_NUMBER() OVER (PARTITION BY County, State ORDER BY 
-                    CASE WHEN fipscode IS NOT NULL AND fipscode != '' THEN 0 ELSE 1 END,
-                    measure_count DESC
-                ) as rn
-            FROM county_health_scores
-        )
-        SELECT 
-            County,
-            State,
-            fipscode,
-            measure_count,
-            CASE 
-                WHEN avg_penalty IS NULL THEN 0
-                ELSE MAX(0, 100 - avg_penalty)
-            END as health_score
-        FROM ranked_counties
-        WHERE rn = 1
-        """
-        
-        params = []
-        conditions = []
+        is_default = not county and not state and not cursor and page == 1 and per_page == 20
+        if is_default and _rankings_default['body'] is not None:
+            return app.response_class(_rankings_default['body'], mimetype='application/json')
         
-        if county:
-            conditions.append("County = ?")
-            params.append(county)
+        # Reject malformed input before touching the database
+        if page < 1 or per_page < 1:
+            return ojsonify({'success': False, 'error': 'page and per_page must be positive integers'}, 400)
         
         if state:
-            conditions.append("State = ?")
-            params.append(state)
-        
-        if conditions:
-            query += " AND " + " AND ".join(conditions)
+            state = state.upper()
         
-        query += " ORDER BY health_score DESC"
-        query += " LIMIT ? OFFSET ?"
-        params.extend([per_page, offset])
+        if state and not _STATE_CODE.fullmatch(state):
+            return ojsonify({'success': False, 'error': 'Invalid state'}, 400)
         
-        rankings = conn.execute(query, params).fetchall()
-        
-        # Convert to result format
-        result = []
-        for ranking in rankings:
-            result.append({
-                'county': ranking['County'],
-                'state': ranking['State'],
-                'fipscode': ranking['fipscode'],
-                'measure_count': ranking['measure_count'],
-                'health_score': round(ranking['health_score'], 1),
-                'health_measures': []  # Will be loaded on demand
+        with borrow() as conn:
+            # Limit per_page to prevent excessive load
+            per_page = min(per_page, 50)
+            
+            # Build optimized query - counties with their pre-calculated health scores
+            if cursor:
+                try:
+                    params = parse_rankings_cursor(cursor)
+                except ValueError:
+                    return ojsonify({'success': False, 'error': 'Invalid cursor'}, 400)
+                query = _Q_RANKINGS_AFTER_CURSOR[bool(county), bool(state)]
+            else:
+                params = []
+                query = _Q_RANKINGS[bool(county), bool(state)]
+            
+            if county:
+                params.append(county)
+            
+            if state:
+                params.append(state)
+            
+            params.append(per_page)
+            
+            if not cursor:
+                # Calculate offset
+                params.append((page - 1) * per_page)
+            
+            rankings = conn.cursor().execute(query, params).fetchall()
+            
+            # Convert to result format (health_measures are loaded on demand)
+            result = [
+                {
+                    'county': c,
+                    'state': s,
+                    'fipscode': f,
+                    'measure_count': m,
+                    'health_score': round(h, 1),
+                    'health_measures': []
+                }
+                for c, s, f, m, h, *_ in rankings
+            ]
+            
+            # A full page may have more rows after it; resume from its last key
+            next_cursor = None
+            if rankings and len(rankings) == per_page:
+                last = rankings[-1]
+                next_cursor = f"{last[4]!r},{last[0]},{last[1]}"
+            
+            if cursor:
+                return ojsonify({
+                    'success': True,
+                    'count': len(result),
+                    'per_page': per_page,
+                    'next_cursor': next_cursor,
+                    'data': result
+                })
+            
+            # Every row carries the total match count, so pagination needs no second query
+            if rankings:
+                total_count = rankings[0][5]
+            elif page > 1:
+                total_count = conn.cursor().execute(
+                    _Q_RANKINGS_COUNT[bool(county), bool(state)], params[:-2]
+                ).fetchone()[0]
+            else:
+                total_count = 0
+            
+            body = orjson.dumps({
+                'success': True,
+                'count': len(result),
+                'total': total_count,
+                'page': page,
+                'per_page': per_page,
+                'total_pages': (total_count + per_page - 1) // per_page,
+                'next_cursor': next_cursor,
+                'data': result
             })
-        
-        # Get total count for pagination
-        count_query = """
-        SELECT COUNT(DISTINCT County || ', ' || State) as total
-        FROM county_health_rankings
-        WHERE County != 'United States' 
-        AND County != State
-        AND County LIKE '%County%'
-        """
-        count_params = []
-        count_conditions = []
-        
-        if county:
-            count_conditions.append("County = ?")
-            count_params.append(county)
-        
-        if state:
-            count_conditions.append("State = ?")
-            count_params.append(state)
-        
-        if count_conditions:
-            count_query += " AND " + " AND ".join(count_conditions)
-        
-        total_count = conn.execute(count_query, count_params).fetchone()['total']
-        
-        conn.close()
-        
-        return jsonify({
-            'success': True,
-            'count': len(result),
-            'total': total_count,
-            'page': page,
-            'per_page': per_page,
-            'total_pages': (total_count + per_page - 1) // per_page,
-            'data': result
-        })
-        
+            if is_default:
+                _rankings_default['body'] = body
+            
+            return app.response_class(body, mimetype='application/json')
+            
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return ojsonify({'success': False, 'error': str(e)}, 500)
+
+# Health score and key measures in one statement; SQLite renders the measures
+# straight to a JSON array so they never become Python objects
+_Q_HEALTH_DETAILS = """
+    SELECT 
+        (SELECT health_score FROM county_health_score
+         WHERE County = ? AND State = ?) as health_score,
+        (SELECT json_group_array(json_object(
+            'Measure_name', Measure_name,
+            'Raw_value', Raw_value,
+            'Year_span', Year_span,
+            'Data_Release_Year', Data_Release_Year
+         ))
+         FROM (
+            SELECT Measure_name, Raw_value, Year_span, Data_Release_Year
+            FROM county_health_rankings 
+            WHERE County = ? AND State = ?
+            AND Measure_name IN ({key_health_measures})
+            ORDER BY Data_Release_Year DESC, Measure_name
+         )) as measures_json
+    """.format(key_health_measures=KEY_HEALTH_MEASURES)
 
 @app.route('/api/health_rankings/<county>/<state>', methods=['GET'])
 def get_county_health_details(county, state):
     """Get detailed health measures for a specific county"""
     try:
-        conn = get_db_connection()
-        
-        # Use the same health score calculation as the rankings page
-        score_query = """
-        WITH county_health_scores AS (
-            SELECT 
-                AVG(CASE 
-                    WHEN Measure_name = 'Adult obesity' THEN CAST(Raw_value AS REAL) * 100
-                    WHEN Measure_name = 'Physical inactivity' THEN CAST(Raw_value AS REAL) * 100
-                    WHEN Measure_name = 'Children in poverty' THEN CAST(Raw_value AS REAL) * 100
-                    WHEN Measure_name = 'Unemployment' THEN CAST(Raw_value AS REAL) * 100
-                    WHEN Measure_name = 'Uninsured' THEN CAST(Raw_value AS REAL) * 100
-                    WHEN Measure_name = 'Violent crime rate' THEN CAST(Raw_value AS REAL) / 10
-                    WHEN Measure_name = 'Preventable hospital stays' THEN CAST(Raw_value AS REAL) / 100
-                    ELSE 0
-                END) as avg_penalty
-            FROM county_health_rankings
-            WHERE County = ? AND State = ?
-            AND Measure_name IN (
-                'Violent crime rate',
-                'Unemployment', 
-                'Children in poverty',
-                'Adult obesity',
-                'Physical inactivity',
-                'Uninsured',
-                'Preventable hospital stays'
+        with borrow() as conn:
+            # Use the same health score as the rankings page
+            score, measures_json = conn.cursor().execute(
+                _Q_HEALTH_DETAILS, [county, state, county, state]
+            ).fetchone()
+            health_score = round(score, 1) if score is not None else 0
+            
+            # Splice the DB-built measures array into the response without re-encoding it
+            body = b'{"success":true,"data":{"county":%s,"state":%s,"health_score":%s,"health_measures":%s}}' % (
+                orjson.dumps(county), orjson.dumps(state), orjson.dumps(health_score), measures_json.encode()
             )
-            AND Raw_value IS NOT NULL 
-            AND Raw_value != ''
-        )
-        SELECT 
-            CASE 
-                WHEN avg_penalty IS NULL THEN 0
-                ELSE MAX(0, 100 - avg_penalty)
-            END as health_score
-        FROM county_health_scores
-        """
-        
-        health_score_result = conn.execute(score_query, [county, state]).fetchone()
-        health_score = round(health_score_result['health_score'], 1) if health_score_result else 0
-        
-        # Get key health measures for this county
-        health_query = """
-        SELECT 
-            Measure_name,
-            Raw_value,
-            Year_span,
-            Data_Release_Year
-        FROM county_health_rankings 
-        WHERE County = ? AND State = ?
-        AND Measure_name IN (
-            'Violent crime rate',
-            'Unemployment', 
-            'Children in poverty',
-            'Adult obesity',
-            'Physical inactivity',
-            'Uninsured',
-            'Preventable hospital stays'
-        )
-        ORDER BY Data_Release_Year DESC, Measure_name
-        """
-        health_measures = conn.execute(health_query, [county, state]).fetchall()
-        
-        conn.close()
-        
-        return jsonify({
-            'success': True,
-            'data': {
-                'county': county,
-                'state': state,
-                'health_score': health_score,
-                'health_measures': [dict(measure) for measure in health_measures]
-            }
-        })
-        
+            return app.response_class(body, mimetype='application/json')
+            
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return ojsonify({'success': False, 'error': str(e)}, 500)
+
+_Q_SEARCH = """
+    SELECT 
+        z.county,
+        z.state_abbreviation as state,
+        z.default_city,
+        COUNT(z.zip) as zip_count
+    FROM zip_county z
+    WHERE z.rowid IN (SELECT rowid FROM zip_county_fts WHERE zip_county_fts MATCH ?)
+    AND z.county != '' AND z.state_abbreviation != ''
+    GROUP BY z.county, z.state_abbreviation, z.default_city
+    ORDER BY z.county
+    """
+
+# Words of a search query, each matched as a token prefix in zip_county_fts
+_SEARCH_TOKEN = re.compile(r'\w+')
 
 @app.route('/api/search', methods=['GET'])
 def search_counties():
@@ -606,482 +976,455 @@ def search_counties():
     try:
         query_param = request.args.get('q', '').strip()
         if not query_param:
-            return jsonify({'success': False, 'error': 'Query parameter "q" is required'}), 400
-        
-        conn = get_db_connection()
-        
-        search_query = """
-        SELECT DISTINCT 
-            z.county,
-            z.state_abbreviation as state,
-            z.default_city,
-            COUNT(z.zip) as zip_count
-        FROM zip_county z
-        WHERE (z.county LIKE ? OR z.state_abbreviation LIKE ?)
-        AND z.county != '' AND z.state_abbreviation != ''
-        GROUP BY z.county, z.state_abbreviation, z.default_city
-        ORDER BY z.county
-        """
-        
-        search_term = f"%{query_param}%"
-        results = conn.execute(search_query, [search_term, search_term]).fetchall()
-        conn.close()
-        
-        counties = []
-        for county in results:
-            counties.append({
-                'county': county['county'],
-                'state': county['state'],
-                'default_city': county['default_city'],
-                'zip_count': county['zip_count']
+            return ojsonify({'success': False, 'error': 'Query parameter "q" is required'}, 400)
+        
+        with borrow() as conn:
+            # Quote every word so user input can never be parsed as FTS5 query syntax
+            tokens = _SEARCH_TOKEN.findall(query_param)
+            match = ' '.join(f'"{token}"*' for token in tokens)
+            counties = [
+                {'county': c, 'state': s, 'default_city': d, 'zip_count': z}
+                for c, s, d, z in conn.cursor().execute(_Q_SEARCH, (match,))
+            ] if tokens else []
+            
+            return ojsonify({
+                'success': True,
+                'query': query_param,
+                'count': len(counties),
+                'data': counties
             })
-        
-        return jsonify({
-            'success': True,
-            'query': query_param,
-            'count': len(counties),
-            'data': counties
-        })
-        
+            
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return ojsonify({'success': False, 'error': str(e)}, 500)
+
+_Q_STATS_COUNTS = """
+    SELECT 
+        (SELECT COUNT(*) FROM zip_county) as zip_count,
+        (SELECT COUNT(DISTINCT county || ', ' || state_abbreviation) FROM zip_county
+         WHERE county != '' AND state_abbreviation != '') as county_count,
+        (SELECT COUNT(DISTINCT state_abbreviation) FROM zip_county
+         WHERE state_abbreviation != '') as state_count,
+        (SELECT COUNT(*) FROM county_health_rankings) as health_count
+    """
+
+_Q_STATS_STATE_DISTRIBUTION = """
+    SELECT state_abbreviation as state, COUNT(DISTINCT county) as county_count, COUNT(zip) as zip_count
+    FROM zip_county 
+    WHERE state_abbreviation != '' AND county != ''
+    GROUP BY state_abbreviation 
+    ORDER BY county_count DESC
+    """
+
+# Serialized /api/stats response and when it was computed
+STATS_CACHE_TTL = 300  # seconds
+_stats_cache = {'t': 0, 'body': None}
 
 @app.route('/api/stats', methods=['GET'])
 def get_stats():
     """Get overall statistics about the data"""
     try:
-        conn = get_db_connection()
-        
-        # Get counts
-        zip_count = conn.execute("SELECT COUNT(*) FROM zip_county").fetchone()[0]
-        county_count = conn.execute("SELECT COUNT(DISTINCT county || ', ' || state_abbreviation) FROM zip_county WHERE county != '' AND state_abbreviation != ''").fetchone()[0]
-        state_count = conn.execute("SELECT COUNT(DISTINCT state_abbreviation) FROM zip_county WHERE state_abbreviation != ''").fetchone()[0]
-        health_count = conn.execute("SELECT COUNT(*) FROM county_health_rankings").fetchone()[0]
-        
-        # Get state distribution
-        state_dist = conn.execute("""
-            SELECT state_abbreviation as state, COUNT(DISTINCT county) as county_count, COUNT(zip) as zip_count
-            FROM zip_county 
-            WHERE state_abbreviation != '' AND county != ''
-            GROUP BY state_abbreviation 
-            ORDER BY county_count DESC
-        """).fetchall()
+        # The database is read-only between deploys, so serve the cached body while fresh
+        if _stats_cache['body'] is not None and time.time() - _stats_cache['t'] < STATS_CACHE_TTL:
+            return app.response_class(_stats_cache['body'], mimetype='application/json')
         
-        conn.close()
-        
-        state_distribution = []
-        for state in state_dist:
-            state_distribution.append({
-                'state': state['state'],
-                'county_count': state['county_count'],
-                'zip_count': state['zip_count']
+        with borrow() as conn:
+            cursor = conn.cursor()
+            
+            # Get counts in a single round trip
+            zip_count, county_count, state_count, health_count = cursor.execute(_Q_STATS_COUNTS).fetchone()
+            
+            # Get state distribution
+            state_dist = cursor.execute(_Q_STATS_STATE_DISTRIBUTION)
+            
+            state_distribution = [
+                {'state': s, 'county_count': c, 'zip_count': z}
+                for s, c, z in state_dist
+            ]
+            
+            _stats_cache['body'] = orjson.dumps({
+                'success': True,
+                'data': {
+                    'total_zip_codes': zip_count,
+                    'total_counties': county_count,
+                    'total_states': state_count,
+                    'total_health_records': health_count,
+                    'state_distribution': state_distribution
+                }
             })
-        
-        return jsonify({
-            'success': True,
-            'data': {
-                'total_zip_codes': zip_count,
-                'total_counties': county_count,
-                'total_states': state_count,
-                'total_health_records': health_count,
-                'state_distribution': state_distribution
-            }
-        })
-        
+            _stats_cache['t'] = time.time()
+            
+            return app.response_class(_stats_cache['body'], mimetype='application/json')
+            
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return ojsonify({'success': False, 'error': str(e)}, 500)
 
 # =============================================================================
 # LOCATION-BASED SERVICES API
 # =============================================================================
 
+# Fetch the ZIP row, its county's health measures, and the county/city ZIP
+# lists in one statement; 'kind' tags each row's part and 'seq' its order.
+# Each part compares against zc's values rather than joining it, so every
+# part stays a plain index seek
+_Q_LOCATION_ZIP = """
+    WITH zc AS (
+        SELECT zip, county, state_abbreviation, default_city
+        FROM zip_county WHERE zip = ?
+        LIMIT 1
+    )
+    SELECT 
+        0 as kind, 0 as seq,
+        zc.zip, zc.county, zc.state_abbreviation, zc.default_city,
+        (SELECT COUNT(DISTINCT z2.zip) FROM zip_county z2
+         WHERE z2.county = zc.county AND z2.state_abbreviation = zc.state_abbreviation),
+        (SELECT COUNT(DISTINCT z3.zip) FROM zip_county z3
+         WHERE z3.default_city = zc.default_city)
+    FROM zc
+    UNION ALL
+    SELECT 1, * FROM (
+        SELECT 
+            ROW_NUMBER() OVER (ORDER BY h.Data_Release_Year DESC, h.Measure_name),
+            h.Measure_name, h.Raw_value, h.Year_span, h.Data_Release_Year, NULL, NULL
+        FROM county_health_rankings h
+        WHERE h.County = (SELECT county FROM zc)
+        AND h.State = (SELECT state_abbreviation FROM zc)
+        AND h.Measure_name IN ({key_health_measures})
+        ORDER BY h.Data_Release_Year DESC, h.Measure_name
+        LIMIT 10
+    )
+    UNION ALL
+    SELECT 2, ROW_NUMBER() OVER (ORDER BY z.zip), z.zip, NULL, NULL, NULL, NULL, NULL
+    FROM zip_county z
+    WHERE z.county = (SELECT county FROM zc)
+    AND z.state_abbreviation = (SELECT state_abbreviation FROM zc)
+    UNION ALL
+    SELECT 3, ROW_NUMBER() OVER (ORDER BY z.county, z.zip), z.zip, z.county, z.state_abbreviation, NULL, NULL, NULL
+    FROM zip_county z
+    WHERE z.default_city = (SELECT default_city FROM zc)
+    ORDER BY kind, seq
+    """.format(key_health_measures=KEY_HEALTH_MEASURES)
+
 @app.route('/api/location/zip/<zip_code>', methods=['GET'])
+@cached('normal')
 def get_zip_location_details(zip_code):
     """Enhanced ZIP code lookup with comprehensive location data"""
     try:
-        conn = get_db_connection()
-        
-        # Get ZIP code info with all related data
-        zip_query = """
-        SELECT 
-            z.zip as zip_code,
-            z.county,
-            z.state_abbreviation as state,
-            z.default_city,
-            COUNT(DISTINCT z2.zip) as total_zips_in_county,
-            COUNT(DISTINCT z3.zip) as total_zips_in_city
-        FROM zip_county z
-        LEFT JOIN zip_county z2 ON z2.county = z.county AND z2.state_abbreviation = z.state_abbreviation
-        LEFT JOIN zip_county z3 ON z3.default_city = z.default_city
-        WHERE z.zip = ?
-        GROUP BY z.zip, z.county, z.state_abbreviation, z.default_city
-        """
-        
-        zip_data = conn.execute(zip_query, [zip_code]).fetchone()
-        
-        if not zip_data:
-            conn.close()
-            return jsonify({'success': False, 'error': 'ZIP code not found'}), 404
-        
-        # Get health rankings for the county - get key health measures
-        health_query = """
-        SELECT 
-            Measure_name,
-            Raw_value,
-            Year_span,
-            Data_Release_Year
-        FROM county_health_rankings 
-        WHERE County = ? AND State = ?
-        AND Measure_name IN (
-            'Violent crime rate',
-            'Unemployment', 
-            'Children in poverty',
-            'Adult obesity',
-            'Physical inactivity',
-            'Uninsured',
-            'Preventable hospital stays'
-        )
-        ORDER BY Data_Release_Year DESC, Measure_name
-        LIMIT 10
-        """
-        health_data = conn.execute(health_query, [zip_data['county'], zip_data['state']]).fetchall()
-        
-        # Get all ZIP codes in the same county
-        county_zips_query = """
-        SELECT zip FROM zip_county 
-        WHERE county = ? AND state_abbreviation = ?
-        ORDER BY zip
-        """
-        county_zips = conn.execute(county_zips_query, [zip_data['county'], zip_data['state']]).fetchall()
-        
-        # Get all ZIP codes in the same city
-        city_zips_query = """
-        SELECT zip, county, state_abbreviation FROM zip_county 
-        WHERE default_city = ?
-        ORDER BY county, zip
-        """
-        city_zips = conn.execute(city_zips_query, [zip_data['default_city']]).fetchall()
-        
-        conn.close()
-        
-        result = {
-            'zip_code': zip_data['zip_code'],
-            'location': {
-                'county': zip_data['county'],
-                'state': zip_data['state'],
-                'default_city': zip_data['default_city']
-            },
-            'statistics': {
-                'total_zips_in_county': zip_data['total_zips_in_county'],
-                'total_zips_in_city': zip_data['total_zips_in_city']
-            },
-            'health_rankings': [dict(health) for health in health_data] if health_data else [],
-            'county_zips': [zip['zip'] for zip in county_zips],
-            'city_zips': [
-                {
-                    'zip_code': zip['zip'],
-                    'county': zip['county'],
-                    'state': zip['state_abbreviation']
-                } for zip in city_zips
-            ]
-        }
-        
-        return jsonify({
-            'success': True,
-            'data': result
-        })
-        
+        with borrow() as conn:
+            rows = conn.cursor().execute(_Q_LOCATION_ZIP, (zip_code,)).fetchall()
+            
+            if not rows:
+                return ojsonify({'success': False, 'error': 'ZIP code not found'}, 404)
+            
+            _, _, zip_code, county, state, default_city, total_zips_in_county, total_zips_in_city = rows[0]
+            health_data = [row[2:6] for row in rows if row[0] == 1]
+            county_zips = [row[2] for row in rows if row[0] == 2]
+            city_zips = [row[2:5] for row in rows if row[0] == 3]
+            
+            result = {
+                'zip_code': zip_code,
+                'location': {
+                    'county': county,
+                    'state': state,
+                    'default_city': default_city
+                },
+                'statistics': {
+                    'total_zips_in_county': total_zips_in_county,
+                    'total_zips_in_city': total_zips_in_city
+                },
+                'health_rankings': [
+                    {'Measure_name': m, 'Raw_value': r, 'Year_span': y, 'Data_Release_Year': d}
+                    for m, r, y, d in health_data
+                ],
+                'county_zips': county_zips,
+                'city_zips': [
+                    {
+                        'zip_code': z,
+                        'county': c,
+                        'state': st
+                    } for z, c, st in city_zips
+                ]
+            }
+            
+            return ojsonify({
+                'success': True,
+                'data': result
+            })
+            
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return ojsonify({'success': False, 'error': str(e)}, 500)
+
+_Q_CITIES = """
+    SELECT 
+        default_city,
+        COUNT(DISTINCT county || ', ' || state_abbreviation) as county_count,
+        COUNT(DISTINCT state_abbreviation) as state_count,
+        COUNT(zip) as zip_count,
+        GROUP_CONCAT(DISTINCT state_abbreviation) as states
+    FROM zip_county
+    WHERE default_city IS NOT NULL AND default_city != ''
+    AND county != '' AND state_abbreviation != ''
+    {state_filter}
+    GROUP BY default_city
+    ORDER BY zip_count DESC
+    LIMIT ?
+    """
+_Q_CITIES_ALL = _Q_CITIES.format(state_filter='')
+_Q_CITIES_BY_STATE = _Q_CITIES.format(state_filter='AND state_abbreviation = ?')
 
 @app.route('/api/location/cities', methods=['GET'])
+@cached('long', query_args=('state', 'limit'))
 def get_cities():
     """Get all cities with statistics"""
     try:
-        conn = get_db_connection()
-        
-        # Get query parameters
-        state = request.args.get('state')
-        limit = request.args.get('limit', type=int)
-        
-        # Build query
-        query = """
-        SELECT 
-            default_city,
-            COUNT(DISTINCT county || ', ' || state_abbreviation) as county_count,
-            COUNT(DISTINCT state_abbreviation) as state_count,
-            COUNT(zip) as zip_count,
-            GROUP_CONCAT(DISTINCT state_abbreviation) as states
-        FROM zip_county
-        WHERE default_city IS NOT NULL AND default_city != ''
-        AND county != '' AND state_abbreviation != ''
-        """
-        
-        params = []
-        if state:
-            query += " AND state_abbreviation = ?"
-            params.append(state)
+        with borrow() as conn:
+            # Get query parameters
+            state = request.args.get('state')
+            limit = request.args.get('limit', type=int)
             
-        query += " GROUP BY default_city ORDER BY zip_count DESC"
-        
-        if limit:
-            query += " LIMIT ?"
-            params.append(limit)
-        
-        cities = conn.execute(query, params).fetchall()
-        conn.close()
-        
-        result = []
-        for city in cities:
-            result.append({
-                'city': city['default_city'],
-                'county_count': city['county_count'],
-                'state_count': city['state_count'],
-                'zip_count': city['zip_count'],
-                'states': city['states'].split(',') if city['states'] else []
+            # A negative LIMIT returns every row
+            if state:
+                query, params = _Q_CITIES_BY_STATE, (state, limit or -1)
+            else:
+                query, params = _Q_CITIES_ALL, (limit or -1,)
+            
+            result = [
+                {
+                    'city': city,
+                    'county_count': county_count,
+                    'state_count': state_count,
+                    'zip_count': zip_count,
+                    'states': states.split(',') if states else []
+                }
+                for city, county_count, state_count, zip_count, states
+                in conn.cursor().execute(query, params)
+            ]
+            
+            return ojsonify({
+                'success': True,
+                'count': len(result),
+                'data': result
             })
-        
-        return jsonify({
-            'success': True,
-            'count': len(result),
-            'data': result
-        })
-        
+            
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return ojsonify({'success': False, 'error': str(e)}, 500)
 
 @app.route('/api/location/metro_areas/<metro_name>', methods=['GET'])
 def get_metro_area_details(metro_name):
     """Get detailed information about a specific metro area"""
-    try:
-        conn = get_db_connection()
-        
-        # Get metro area details
-        metro_query = """
-        SELECT 
-            metro_area,
-            COUNT(DISTINCT county || ', ' || state) as county_count,
-            COUNT(DISTINCT state) as state_count,
-            COUNT(zip_code) as zip_count,
-            GROUP_CONCAT(DISTINCT state) as states
-        FROM zip_county
-        WHERE metro_area = ?
-        GROUP BY metro_area
-        """
-        
-        metro_data = conn.execute(metro_query, [metro_name]).fetchone()
-        
-        if not metro_data:
-            conn.close()
-            return jsonify({'success': False, 'error': 'Metro area not found'}), 404
-        
-        # Get all counties in this metro area
-        counties_query = """
-        SELECT DISTINCT 
-            county,
-            state,
-            COUNT(zip_code) as zip_count
-        FROM zip_county
-        WHERE metro_area = ?
-        GROUP BY county, state
-        ORDER BY county
-        """
-        counties = conn.execute(counties_query, [metro_name]).fetchall()
-        
-        # Get all ZIP codes in this metro area
-        zips_query = """
-        SELECT zip_code, county, state
-        FROM zip_county
-        WHERE metro_area = ?
-        ORDER BY county, zip_code
-        """
-        zips = conn.execute(zips_query, [metro_name]).fetchall()
-        
-        # Get health rankings for all counties in this metro area
-        health_query = """
-        SELECT h.*, z.metro_area
-        FROM county_health_rankings h
-        JOIN zip_county z ON h.county = z.county AND h.state = z.state
-        WHERE z.metro_area = ?
-        ORDER BY h.health_outcomes_rank
-        """
-        health_rankings = conn.execute(health_query, [metro_name]).fetchall()
-        
-        conn.close()
-        
-        result = {
-            'metro_area': metro_data['metro_area'],
-            'statistics': {
-                'county_count': metro_data['county_count'],
-                'state_count': metro_data['state_count'],
-                'zip_count': metro_data['zip_count'],
-                'states': metro_data['states'].split(',') if metro_data['states'] else []
-            },
-            'counties': [
-                {
-                    'county': county['county'],
-                    'state': county['state'],
-                    'zip_count': county['zip_count']
-                } for county in counties
-            ],
-            'zip_codes': [
-                {
-                    'zip_code': zip['zip_code'],
-                    'county': zip['county'],
-                    'state': zip['state']
-                } for zip in zips
-            ],
-            'health_rankings': [dict(health) for health in health_rankings]
-        }
-        
-        return jsonify({
-            'success': True,
-            'data': result
-        })
-        
-    except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+    # zip_county carries no metro area data (see get_state_details), so there is
+    # nothing to look up
+    return ojsonify({'success': False, 'error': 'Metro area not found'}, 404)
+
+# A negative LIMIT returns every row
+_Q_STATES = """
+    SELECT 
+        state_abbreviation as state,
+        COUNT(DISTINCT county) as county_count,
+        COUNT(DISTINCT default_city) as city_count,
+        COUNT(zip) as zip_count
+    FROM zip_county
+    WHERE state_abbreviation != '' AND county != ''
+    GROUP BY state_abbreviation
+    ORDER BY county_count DESC
+    LIMIT ?
+    """
 
 @app.route('/api/location/states', methods=['GET'])
+@cached('long', query_args=('limit',))
 def get_states():
     """Get all states with statistics"""
     try:
-        conn = get_db_connection()
-        
-        # Get query parameters
-        limit = request.args.get('limit', type=int)
-        
-        query = """
-        SELECT 
-            state_abbreviation as state,
-            COUNT(DISTINCT county) as county_count,
-            COUNT(DISTINCT default_city) as city_count,
-            COUNT(zip) as zip_count
-        FROM zip_county
-        WHERE state_abbreviation != '' AND county != ''
-        GROUP BY state_abbreviation
-        ORDER BY county_count DESC
-        """
-        
-        params = []
-        if limit:
-            query += " LIMIT ?"
-            params.append(limit)
-        
-        states = conn.execute(query, params).fetchall()
-        conn.close()
-        
-        result = []
-        for state in states:
-            result.append({
-                'state': state['state'],
-                'county_count': state['county_count'],
-                'city_count': state['city_count'],
-                'zip_count': state['zip_count']
+        with borrow() as conn:
+            # Get query parameters
+            limit = request.args.get('limit', type=int)
+            
+            result = [
+                {'state': state, 'county_count': county_count, 'city_count': city_count, 'zip_count': zip_count}
+                for state, county_count, city_count, zip_count in conn.cursor().execute(_Q_STATES, (limit or -1,))
+            ]
+            
+            return ojsonify({
+                'success': True,
+                'count': len(result),
+                'data': result
             })
-        
-        return jsonify({
-            'success': True,
-            'count': len(result),
-            'data': result
-        })
-        
+            
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return ojsonify({'success': False, 'error': str(e)}, 500)
+
+_Q_STATE_DETAILS = """
+    SELECT 
+        state_abbreviation as state,
+        COUNT(DISTINCT county) as county_count,
+        0 as metro_count,
+        COUNT(zip) as zip_count
+    FROM zip_county
+    WHERE state_abbreviation = ?
+    GROUP BY state_abbreviation
+    """
+
+_Q_STATE_COUNTIES = """
+    SELECT 
+        county,
+        COUNT(zip) as zip_count
+    FROM zip_county
+    WHERE state_abbreviation = ?
+    GROUP BY county
+    ORDER BY county
+    """
+
+_Q_STATE_HEALTH = """
+    SELECT 
+        State, County, State_code, County_code, Year_span, Measure_name, Measure_id,
+        Numerator, Denominator, Raw_value, Confidence_Interval_Lower_Bound,
+        Confidence_Interval_Upper_Bound, Data_Release_Year, fipscode
+    FROM county_health_rankings
+    WHERE State = ?
+    ORDER BY County, Measure_name, Data_Release_Year DESC
+    """
 
 @app.route('/api/location/states/<state_code>', methods=['GET'])
+@cached('normal')
 def get_state_details(state_code):
     """Get detailed information about a specific state"""
     try:
-        conn = get_db_connection()
-        
-        # Get state details
-        state_query = """
-        SELECT 
-            state,
-            COUNT(DISTINCT county) as county_count,
-            COUNT(DISTINCT metro_area) as metro_count,
-            COUNT(zip_code) as zip_count
-        FROM zip_county
-        WHERE state = ?
-        GROUP BY state
-        """
-        
-        state_data = conn.execute(state_query, [state_code]).fetchone()
-        
-        if not state_data:
-            conn.close()
-            return jsonify({'success': False, 'error': 'State not found'}), 404
-        
-        # Get all counties in this state
-        counties_query = """
-        SELECT DISTINCT 
-            county,
-            metro_area,
-            COUNT(zip_code) as zip_count
-        FROM zip_county
-        WHERE state = ?
-        GROUP BY county, metro_area
-        ORDER BY county
-        """
-        counties = conn.execute(counties_query, [state_code]).fetchall()
-        
-        # Get all metro areas in this state
-        metros_query = """
-        SELECT DISTINCT 
-            metro_area,
-            COUNT(DISTINCT county) as county_count,
-            COUNT(zip_code) as zip_count
-        FROM zip_county
-        WHERE state = ? AND metro_area IS NOT NULL AND metro_area != ''
-        GROUP BY metro_area
-        ORDER BY zip_count DESC
-        """
-        metros = conn.execute(metros_query, [state_code]).fetchall()
-        
-        # Get health rankings for all counties in this state
-        health_query = """
-        SELECT * FROM county_health_rankings
-        WHERE state = ?
-        ORDER BY health_outcomes_rank
-        """
-        health_rankings = conn.execute(health_query, [state_code]).fetchall()
-        
-        conn.close()
-        
-        result = {
-            'state': state_data['state'],
-            'statistics': {
-                'county_count': state_data['county_count'],
-                'metro_count': state_data['metro_count'],
-                'zip_count': state_data['zip_count']
-            },
-            'counties': [
-                {
-                    'county': county['county'],
-                    'metro_area': county['metro_area'],
-                    'zip_count': county['zip_count']
-                } for county in counties
-            ],
-            'metro_areas': [
-                {
-                    'metro_area': metro['metro_area'],
-                    'county_count': metro['county_count'],
-                    'zip_count': metro['zip_count']
-                } for metro in metros
-            ],
-            'health_rankings': [dict(health) for health in health_rankings]
-        }
-        
-        return jsonify({
-            'success': True,
-            'data': result
-        })
+        with borrow() as conn:
+            cursor = conn.cursor()
+            
+            # Get state details (zip_county carries no metro area data)
+            state_data = cursor.execute(_Q_STATE_DETAILS, (state_code,)).fetchone()
+            
+            if not state_data:
+                return ojsonify({'success': False, 'error': 'State not found'}, 404)
+            
+            # Get all counties in this state
+            counties = cursor.execute(_Q_STATE_COUNTIES, (state_code,)).fetchall()
+            
+            state, county_count, metro_count, zip_count = state_data
+            result = {
+                'state': state,
+                'statistics': {
+                    'county_count': county_count,
+                    'metro_count': metro_count,
+                    'zip_count': zip_count
+                },
+                'counties': [
+                    {'county': county, 'metro_area': None, 'zip_count': n}
+                    for county, n in counties
+                ],
+                'metro_areas': []
+            }
         
+        # The health rankings run to thousands of rows, so they are streamed one
+        # row at a time after the rest of the payload instead of built as a list
+        def stream():
+            yield b'{"success":true,"data":' + orjson.dumps(result)[:-1] + b',"health_rankings":['
+            with borrow() as conn:
+                cursor = conn.cursor().execute(_Q_STATE_HEALTH, (state_code,))
+                health_keys = [col[0] for col in cursor.description]
+                separator = b''
+                for row in cursor:
+                    yield separator + orjson.dumps(dict(zip(health_keys, row)))
+                    separator = b','
+            yield b']}}'
+        
+        return app.response_class(stream(), mimetype='application/json')
+            
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return ojsonify({'success': False, 'error': str(e)}, 500)
+
+# One statement searches all four location types; arms whose type was not
+# requested are switched off by their constant :type condition. Results are ranked
+# in SQL: exact name matches first, then states for short queries, then by type
+# and name (seq keeps rows of one ZIP in table order), so LIMIT applies in SQLite.
+_LOCATION_SEARCH_TEMPLATE = """
+    SELECT type, name, county, state, default_city, zip_count, county_count FROM (
+    SELECT 
+        'zip' as type, zip as name, county, state_abbreviation as state, default_city,
+        NULL as zip_count, NULL as county_count, rowid as seq
+    FROM zip_county
+    WHERE :type IN ('all', 'zip')
+    AND {zip_match}
+    AND (:state IS NULL OR state_abbreviation = :state)
+    UNION ALL
+    SELECT 
+        'county', county, county, state_abbreviation, default_city,
+        COUNT(zip), NULL, NULL
+    FROM zip_county
+    WHERE :type IN ('all', 'county')
+    AND {county_match} AND county != '' AND state_abbreviation != ''
+    AND (:state IS NULL OR state_abbreviation = :state)
+    GROUP BY county, state_abbreviation, default_city
+    UNION ALL
+    SELECT 
+        'city', default_city, NULL, NULL, default_city,
+        COUNT(zip), COUNT(DISTINCT county || ', ' || state_abbreviation), NULL
+    FROM zip_county
+    WHERE :type IN ('all', 'metro')
+    AND {city_match} AND default_city IS NOT NULL AND default_city != ''
+    AND county != '' AND state_abbreviation != ''
+    AND (:state IS NULL OR state_abbreviation = :state)
+    GROUP BY default_city
+    UNION ALL
+    SELECT 
+        'state', state_abbreviation, NULL, state_abbreviation, NULL,
+        COUNT(zip), COUNT(DISTINCT county), NULL
+    FROM zip_county
+    WHERE :type IN ('all', 'state')
+    AND state_abbreviation LIKE :pattern AND state_abbreviation != ''
+    GROUP BY state_abbreviation
+    )
+    ORDER BY 
+        upper(name) != upper(:query),
+        NOT (type = 'state' AND :short_query),
+        CASE type WHEN 'state' THEN 1 WHEN 'zip' THEN 2 WHEN 'county' THEN 3 ELSE 4 END,
+        name, seq, state, default_city
+    LIMIT :limit
+    """
+
+_Q_LOCATION_SEARCH_SCAN = _LOCATION_SEARCH_TEMPLATE.format(
+    zip_match="zip LIKE :pattern",
+    county_match="county LIKE :pattern",
+    city_match="default_city LIKE :pattern",
+)
+
+_Q_LOCATION_SEARCH_TRIGRAM = _LOCATION_SEARCH_TEMPLATE.format(
+    zip_match="rowid IN (SELECT rowid FROM zip_county_trigram WHERE zip LIKE :pattern)",
+    county_match="rowid IN (SELECT rowid FROM zip_county_trigram WHERE county LIKE :pattern)",
+    city_match="rowid IN (SELECT rowid FROM zip_county_trigram WHERE default_city LIKE :pattern)",
+)
+
+# Common state names mapped to their abbreviations
+_STATE_NAMES = {
+    'virginia': 'VA', 'california': 'CA', 'texas': 'TX', 'florida': 'FL',
+    'new york': 'NY', 'pennsylvania': 'PA', 'illinois': 'IL', 'ohio': 'OH',
+    'georgia': 'GA', 'north carolina': 'NC', 'michigan': 'MI', 'new jersey': 'NJ',
+    'tennessee': 'TN', 'indiana': 'IN', 'missouri': 'MO', 'maryland': 'MD',
+    'wisconsin': 'WI', 'colorado': 'CO', 'minnesota': 'MN', 'south carolina': 'SC',
+    'alabama': 'AL', 'louisiana': 'LA', 'kentucky': 'KY', 'oregon': 'OR',
+    'oklahoma': 'OK', 'connecticut': 'CT', 'utah': 'UT', 'iowa': 'IA',
+    'nevada': 'NV', 'arkansas': 'AR', 'mississippi': 'MS', 'kansas': 'KS',
+    'new mexico': 'NM', 'nebraska': 'NE', 'west virginia': 'WV', 'idaho': 'ID',
+    'hawaii': 'HI', 'new hampshire': 'NH', 'maine': 'ME', 'montana': 'MT',
+    'rhode island': 'RI', 'delaware': 'DE', 'south dakota': 'SD', 'north dakota': 'ND',
+    'alaska': 'AK', 'vermont': 'VT', 'wyoming': 'WY'
+}
+_STATE_ABBREVS = frozenset(_STATE_NAMES.values())
+_VALID_TYPES = frozenset({'all', 'county', 'state', 'metro', 'zip'})
+
+# Answers a search that can only match one state with a single index lookup
+_Q_LOCATION_SEARCH_STATE = """
+    SELECT 
+        'state', state_abbreviation, NULL, state_abbreviation, NULL,
+        COUNT(zip), COUNT(DISTINCT county)
+    FROM zip_county
+    WHERE state_abbreviation = ?
+    GROUP BY state_abbreviation
+    LIMIT ?
+    """
 
 @app.route('/api/location/search', methods=['GET'])
+@cached('short', query_args=('q', 'type', 'state', 'limit'))
 def search_locations():
     """Advanced location search with multiple criteria"""
     try:
@@ -1091,231 +1434,135 @@ def search_locations():
         limit = request.args.get('limit', type=int)
         
         if not query:
-            return jsonify({'success': False, 'error': 'Query parameter "q" is required'}), 400
+            return ojsonify({'success': False, 'error': 'Query parameter "q" is required'}, 400)
         
-        # Map common state names to abbreviations
-        state_name_mapping = {
-            'virginia': 'VA', 'california': 'CA', 'texas': 'TX', 'florida': 'FL',
-            'new york': 'NY', 'pennsylvania': 'PA', 'illinois': 'IL', 'ohio': 'OH',
-            'georgia': 'GA', 'north carolina': 'NC', 'michigan': 'MI', 'new jersey': 'NJ',
-            'tennessee': 'TN', 'indiana': 'IN', 'missouri': 'MO', 'maryland': 'MD',
-            'wisconsin': 'WI', 'colorado': 'CO', 'minnesota': 'MN', 'south carolina': 'SC',
-            'alabama': 'AL', 'louisiana': 'LA', 'kentucky': 'KY', 'oregon': 'OR',
-            'oklahoma': 'OK', 'connecticut': 'CT', 'utah': 'UT', 'iowa': 'IA',
-            'nevada': 'NV', 'arkansas': 'AR', 'mississippi': 'MS', 'kansas': 'KS',
-            'new mexico': 'NM', 'nebraska': 'NE', 'west virginia': 'WV', 'idaho': 'ID',
-            'hawaii': 'HI', 'new hampshire': 'NH', 'maine': 'ME', 'montana': 'MT',
-            'rhode island': 'RI', 'delaware': 'DE', 'south dakota': 'SD', 'north dakota': 'ND',
-            'alaska': 'AK', 'vermont': 'VT', 'wyoming': 'WY'
-        }
+        if location_type not in _VALID_TYPES:
+            return ojsonify({'success': False, 'error': 'Invalid type'}, 400)
         
-        # Check if query matches a full state name
-        if query.lower() in state_name_mapping:
-            query = state_name_mapping[query.lower()]
+        if state:
+            state = state.upper()
+            if not _STATE_CODE.fullmatch(state):
+                return ojsonify({'success': False, 'error': 'Invalid state'}, 400)
         
-        conn = get_db_connection()
-        results = []
+        # Map common state names to abbreviations
+        state_name = query.lower() in _STATE_NAMES
+        query = _STATE_NAMES.get(query.lower(), query)
         
-        # Search ZIP codes
-        if location_type in ['all', 'zip']:
-            zip_query = """
-            SELECT 
-                'zip' as type,
-                zip as name,
-                county,
-                state_abbreviation as state,
-                default_city,
-                'ZIP Code' as description
-            FROM zip_county
-            WHERE zip LIKE ?
-            """
-            params = [f"%{query}%"]
-            if state:
-                zip_query += " AND state_abbreviation = ?"
-                params.append(state)
-            
-            zip_results = conn.execute(zip_query, params).fetchall()
-            results.extend([dict(row) for row in zip_results])
+        # A full state name, or a state code searched as a state, can only mean
+        # that one state, so skip the ZIP/county/city arms entirely
+        state_only = query.upper() in _STATE_ABBREVS and (
+            location_type == 'state' or (state_name and location_type == 'all')
+        )
         
-        # Search counties
-        if location_type in ['all', 'county']:
-            county_query = """
-            SELECT DISTINCT
-                'county' as type,
-                county as name,
-                county,
-                state_abbreviation as state,
-                default_city,
-                COUNT(zip) as zip_count,
-                'County' as description
-            FROM zip_county
-            WHERE county LIKE ? AND county != '' AND state_abbreviation != ''
-            """
-            params = [f"%{query}%"]
-            if state:
-                county_query += " AND state_abbreviation = ?"
-                params.append(state)
+        with borrow() as conn:
+            if state_only:
+                rows = conn.cursor().execute(_Q_LOCATION_SEARCH_STATE, (query.upper(), limit or -1))
+            else:
+                # Trigram lookups need at least three characters; shorter patterns scan
+                search_query = _Q_LOCATION_SEARCH_TRIGRAM if len(query) >= 3 else _Q_LOCATION_SEARCH_SCAN
+                rows = conn.cursor().execute(search_query, {
+                    'type': location_type,
+                    'pattern': f"%{query}%",
+                    'state': state or None,
+                    'query': query,
+                    'short_query': len(query) <= 3,
+                    'limit': limit or -1
+                })
             
-            county_query += " GROUP BY county, state_abbreviation, default_city"
-            county_results = conn.execute(county_query, params).fetchall()
-            results.extend([dict(row) for row in county_results])
-        
-        # Search cities
-        if location_type in ['all', 'metro']:
-            city_query = """
-            SELECT DISTINCT
-                'city' as type,
-                default_city as name,
-                default_city,
-                COUNT(DISTINCT county || ', ' || state_abbreviation) as county_count,
-                COUNT(zip) as zip_count,
-                'City' as description
-            FROM zip_county
-            WHERE default_city LIKE ? AND default_city IS NOT NULL AND default_city != ''
-            AND county != '' AND state_abbreviation != ''
-            """
-            params = [f"%{query}%"]
-            if state:
-                city_query += " AND state_abbreviation = ?"
-                params.append(state)
+            results = []
+            for kind, name, county, row_state, default_city, zip_count, county_count in rows:
+                if kind == 'zip':
+                    results.append({'type': kind, 'name': name, 'county': county, 'state': row_state,
+                                    'default_city': default_city, 'description': 'ZIP Code'})
+                elif kind == 'county':
+                    results.append({'type': kind, 'name': name, 'county': county, 'state': row_state,
+                                    'default_city': default_city, 'zip_count': zip_count, 'description': 'County'})
+                elif kind == 'city':
+                    results.append({'type': kind, 'name': name, 'default_city': default_city,
+                                    'county_count': county_count, 'zip_count': zip_count, 'description': 'City'})
+                else:
+                    results.append({'type': kind, 'name': name, 'state': row_state,
+                                    'county_count': county_count, 'zip_count': zip_count, 'description': 'State'})
+            
+            return ojsonify({
+                'success': True,
+                'query': query,
+                'type': location_type,
+                'count': len(results),
+                'data': results
+            })
             
-            city_query += " GROUP BY default_city"
-            city_results = conn.execute(city_query, params).fetchall()
-            results.extend([dict(row) for row in city_results])
-        
-        # Search states
-        if location_type in ['all', 'state']:
-            state_query = """
-            SELECT DISTINCT
-                'state' as type,
-                state_abbreviation as name,
-                state_abbreviation as state,
-                COUNT(DISTINCT county) as county_count,
-                COUNT(zip) as zip_count,
-                'State' as description
-            FROM zip_county
-            WHERE state_abbreviation LIKE ? AND state_abbreviation != ''
-            GROUP BY state_abbreviation
-            """
-            params = [f"%{query}%"]
-            state_results = conn.execute(state_query, params).fetchall()
-            results.extend([dict(row) for row in state_results])
-        
-        conn.close()
-        
-        # Sort results by relevance and type priority
-        type_priority = {'state': 1, 'zip': 2, 'county': 3, 'city': 4}
-        
-        def sort_key(item):
-            # Prioritize exact matches
-            is_exact_match = item['name'].upper() == query.upper()
-            # Prioritize states for short queries
-            is_state_priority = item['type'] == 'state' and len(query) <= 3
-            return (not is_exact_match, not is_state_priority, type_priority.get(item['type'], 5), item['name'])
-        
-        results.sort(key=sort_key)
-        
-        if limit:
-            results = results[:limit]
-        
-        return jsonify({
-            'success': True,
-            'query': query,
-            'type': location_type,
-            'count': len(results),
-            'data': results
-        })
-        
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return ojsonify({'success': False, 'error': str(e)}, 500)
+
+_Q_ANALYTICS_STATES = """
+    SELECT state, county_count, zip_count, city_count
+    FROM analytics_state_distribution
+    ORDER BY county_count DESC
+    """
+
+_Q_ANALYTICS_CITIES = """
+    SELECT city, county_count, state_count, zip_count
+    FROM analytics_city_summary
+    ORDER BY zip_count DESC
+    LIMIT 10
+    """
+
+_Q_ANALYTICS_HEALTH = """
+    SELECT state, county_count, health_records
+    FROM analytics_health_by_state
+    ORDER BY county_count DESC
+    """
 
 @app.route('/api/location/analytics', methods=['GET'])
+@cached('long')
 def get_location_analytics():
-    """Get location analytics and insights"""
+    """Get location analytics and insights from the precomputed summary tables"""
     try:
-        conn = get_db_connection()
-        
-        # Geographic distribution
-        state_dist = conn.execute("""
-            SELECT 
-                state_abbreviation as state,
-                COUNT(DISTINCT county) as county_count,
-                COUNT(zip) as zip_count,
-                COUNT(DISTINCT default_city) as city_count
-            FROM zip_county
-            WHERE state_abbreviation != '' AND county != ''
-            GROUP BY state_abbreviation
-            ORDER BY county_count DESC
-        """).fetchall()
-        
-        # City analysis
-        city_analysis = conn.execute("""
-            SELECT 
-                default_city as city,
-                COUNT(DISTINCT county || ', ' || state_abbreviation) as county_count,
-                COUNT(DISTINCT state_abbreviation) as state_count,
-                COUNT(zip) as zip_count
-            FROM zip_county
-            WHERE default_city IS NOT NULL AND default_city != ''
-            AND county != '' AND state_abbreviation != ''
-            GROUP BY default_city
-            ORDER BY zip_count DESC
-            LIMIT 10
-        """).fetchall()
-        
-        # Health rankings by state
-        health_by_state = conn.execute("""
-            SELECT 
-                h.State as state,
-                COUNT(DISTINCT h.County) as county_count,
-                COUNT(*) as health_records
-            FROM county_health_rankings h
-            WHERE h.County != 'United States' 
-            AND h.County != h.State
-            AND h.County LIKE '%County%'
-            GROUP BY h.State
-            ORDER BY county_count DESC
-        """).fetchall()
-        
-        conn.close()
-        
-        result = {
-            'geographic_distribution': [
-                {
-                    'state': state['state'],
-                    'county_count': state['county_count'],
-                    'zip_count': state['zip_count'],
-                    'city_count': state['city_count']
-                } for state in state_dist
-            ],
-            'top_cities': [
-                {
-                    'city': city['city'],
-                    'county_count': city['county_count'],
-                    'state_count': city['state_count'],
-                    'zip_count': city['zip_count']
-                } for city in city_analysis
-            ],
-            'health_by_state': [
-                {
-                    'state': health['state'],
-                    'county_count': health['county_count'],
-                    'health_records': health['health_records']
-                } for health in health_by_state
-            ]
-        }
-        
-        return jsonify({
-            'success': True,
-            'data': result
-        })
-        
+        with borrow() as conn:
+            cursor = conn.cursor()
+            
+            # Geographic distribution
+            state_dist = cursor.execute(_Q_ANALYTICS_STATES).fetchall()
+            
+            # City analysis
+            city_analysis = cursor.execute(_Q_ANALYTICS_CITIES).fetchall()
+            
+            # Health rankings by state
+            health_by_state = cursor.execute(_Q_ANALYTICS_HEALTH).fetchall()
+            
+            result = {
+                'geographic_distribution': [
+                    {'state': state, 'county_count': county_count, 'zip_count': zip_count, 'city_count': city_count}
+                    for state, county_count, zip_count, city_count in state_dist
+                ],
+                'top_cities': [
+                    {'city': city, 'county_count': county_count, 'state_count': state_count, 'zip_count': zip_count}
+                    for city, county_count, state_count, zip_count in city_analysis
+                ],
+                'health_by_state': [
+                    {'state': state, 'county_count': county_count, 'health_records': health_records}
+                    for state, county_count, health_records in health_by_state
+                ]
+            }
+            
+            return ojsonify({
+                'success': True,
+                'data': result
+            })
+            
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return ojsonify({'success': False, 'error': str(e)}, 500)
 
 
+# The data is static between deploys, so render the default rankings page once at startup
+if SCHEMA_READY:
+    with app.test_request_context('/api/health_rankings'):
+        get_health_rankings()
 
 if __name__ == '__main__':
-    import os
+    if sys.argv[1:2] == ['--prepare-db']:
+        apply_schema(sys.argv[2] if len(sys.argv) > 2 else DATABASE_PATH)
+        sys.exit(0)
     port = int(os.environ.get('PORT', 5002))
     app.run(debug=True, port=port)
@@ -15,8 +15,12 @@ import sys
 import csv
 import sqlite3
 import os
+from itertools import islice
 from pathlib import Path
 
+# Rows handed to each executemany call while loading
+INSERT_CHUNK_SIZE = 10_000
+
 
 def create_table_from_csv(cursor, csv_file, table_name):
     """
@@ -63,14 +67,39 @@ def create_table_from_csv(cursor, csv_file, table_name):
         # Insert data
         placeholders = ', '.join(['?' for _ in clean_headers])
         insert_sql = f'INSERT INTO "{table_name}" VALUES ({placeholders})'
+        column_count = len(clean_headers)
+        
+        def rows():
+            for row in reader:
+                # Pad row with empty strings if it's shorter than expected
+                if len(row) < column_count:
+                    row = row + [''] * (column_count - len(row))
+                # Truncate row if it's longer than expected
+                yield row[:column_count]
         
-        for row in reader:
-            # Pad row with empty strings if it's shorter than expected
-            while len(row) < len(clean_headers):
-                row.append('')
-            # Truncate row if it's longer than expected
-            row = row[:len(clean_headers)]
-            cursor.execute(insert_sql, row)
+        # Load everything in one transaction with an in-memory journal and no fsyncs,
+        # then restore the connection's previous settings. A failed load is rolled
+        # back before the settings are restored, since they cannot change mid-transaction.
+        journal_mode = cursor.execute("PRAGMA journal_mode").fetchone()[0]
+        synchronous = cursor.execute("PRAGMA synchronous").fetchone()[0]
+        cursor.execute("PRAGMA journal_mode=MEMORY")
+        cursor.execute("PRAGMA synchronous=OFF")
+        try:
+            cursor.execute("BEGIN")
+            batches = rows()
+            while True:
+                batch = list(islice(batches, INSERT_CHUNK_SIZE))
+                if not batch:
+                    break
+                cursor.executemany(insert_sql, batch)
+            cursor.execute("COMMIT")
+        except BaseException:
+            if cursor.connection.in_transaction:
+                cursor.execute("ROLLBACK")
+            raise
+        finally:
+            cursor.execute(f"PRAGMA journal_mode={journal_mode}")
+            cursor.execute(f"PRAGMA synchronous={synchronous}")
 
 
 def main():
@@ -98,6 +127,10 @@ def main():
         conn = sqlite3.connect(db_name)
         cursor = conn.cursor()
         
+        # Use larger pages for the read-heavy API; this only takes effect while the
+        # database is still empty, i.e. before the first table is created
+        cursor.execute("PRAGMA page_size=8192")
+        
         # Get table name from CSV filename (without extension)
         table_name = Path(csv_file).stem
         
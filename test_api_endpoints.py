@@ -10,7 +10,10 @@ import json
 import time
 import os
 import sqlite3
+import gzip
+import brotli
 from unittest.mock import patch
+from urllib.parse import quote
 
 
 class TestAPIEndpoints:
@@ -123,6 +126,25 @@ class TestAPIEndpoints:
         assert data["success"] is True
         assert data["data"]["state"] == "CA"
     
+    def test_county_data_invalid_limit(self):
+        """Test county data endpoint rejects a non-positive limit"""
+        response = requests.get(f"{self.api_base}/county_data?limit=0")
+        assert response.status_code == 400
+        
+        data = response.json()
+        assert data["success"] is False
+        assert "error" in data
+    
+    def test_county_details_name_with_digits(self):
+        """Test county details endpoint with a county name containing digits and punctuation"""
+        county = "Denali Borough||| (created after 1990)"
+        response = requests.get(f"{self.api_base}/county_data/{quote(county)}")
+        assert response.status_code == 200
+        
+        data = response.json()
+        assert data["success"] is True
+        assert data["data"]["county"] == county
+    
     def test_county_details_not_found(self):
         """Test county details endpoint with non-existent county"""
         response = requests.get(f"{self.api_base}/county_data/NonExistentCounty")
@@ -218,6 +240,62 @@ class TestAPIEndpoints:
         assert data["success"] is True
         assert data["per_page"] <= 50  # Should be capped at 50
     
+    def test_health_rankings_cursor_matches_pages(self):
+        """Test following next_cursor returns the same rows as page-by-page fetching"""
+        for filters in ["", "&state=TX"]:
+            first = requests.get(f"{self.api_base}/health_rankings?per_page=50{filters}").json()
+            total_pages = min(first["total_pages"], 6)
+            
+            paged = []
+            for page in range(1, total_pages + 1):
+                data = requests.get(f"{self.api_base}/health_rankings?page={page}&per_page=50{filters}").json()
+                paged.extend((r["county"], r["state"]) for r in data["data"])
+            
+            followed = [(r["county"], r["state"]) for r in first["data"]]
+            next_cursor = first["next_cursor"]
+            for _ in range(total_pages - 1):
+                assert next_cursor is not None
+                response = requests.get(f"{self.api_base}/health_rankings",
+                                        params={"cursor": next_cursor, "per_page": 50, "state": filters[7:] or None})
+                assert response.status_code == 200
+                data = response.json()
+                followed.extend((r["county"], r["state"]) for r in data["data"])
+                next_cursor = data["next_cursor"]
+            
+            assert followed == paged
+    
+    def test_health_rankings_page_past_end(self):
+        """Test health rankings endpoint reports the real total on a page past the last row"""
+        first = requests.get(f"{self.api_base}/health_rankings?state=RI&per_page=50").json()
+        assert first["total"] > 0
+        
+        response = requests.get(f"{self.api_base}/health_rankings?state=RI&per_page=50&page=100")
+        assert response.status_code == 200
+        
+        data = response.json()
+        assert data["count"] == 0
+        assert data["total"] == first["total"]
+        assert data["total_pages"] == first["total_pages"]
+    
+    def test_health_rankings_invalid_cursor(self):
+        """Test health rankings endpoint rejects a malformed cursor"""
+        response = requests.get(f"{self.api_base}/health_rankings?cursor=not-a-cursor")
+        assert response.status_code == 400
+        
+        data = response.json()
+        assert data["success"] is False
+        assert "error" in data
+    
+    def test_health_rankings_invalid_parameters(self):
+        """Test health rankings endpoint rejects invalid page, per_page and state values"""
+        for query in ["page=0", "per_page=0", "page=-1", "state=X1", "state=CAL", "state=CA%0A"]:
+            response = requests.get(f"{self.api_base}/health_rankings?{query}")
+            assert response.status_code == 400, query
+            
+            data = response.json()
+            assert data["success"] is False
+            assert "error" in data
+    
     def test_county_health_details_endpoint(self):
         """Test county health details endpoint"""
         # Get a county from the database
@@ -432,6 +510,24 @@ class TestAPIEndpoints:
         for result in data["data"]:
             assert result["type"] == "state"
     
+    def test_location_search_invalid_parameters(self):
+        """Test location search endpoint rejects an unknown type or malformed state"""
+        for query in ["q=Boston&type=bogus", "q=Boston&state=M%25", "q=Boston&state=Massachusetts"]:
+            response = requests.get(f"{self.api_base}/location/search?{query}")
+            assert response.status_code == 400, query
+            
+            data = response.json()
+            assert data["success"] is False
+            assert "error" in data
+    
+    def test_location_search_state_case_insensitive(self):
+        """Test location search endpoint accepts a lower-case state filter"""
+        upper = requests.get(f"{self.api_base}/location/search?q=Boston&state=MA").json()
+        lower = requests.get(f"{self.api_base}/location/search?q=Boston&state=ma").json()
+        assert lower["success"] is True
+        assert lower["count"] > 0
+        assert lower["data"] == upper["data"]
+    
     def test_location_search_empty_query(self):
         """Test location search endpoint with empty query"""
         response = requests.get(f"{self.api_base}/location/search?q=")
@@ -456,6 +552,60 @@ class TestAPIEndpoints:
             assert field in analytics
             assert isinstance(analytics[field], list)
     
+    def test_location_etag_not_modified(self):
+        """Test cached location endpoints answer a matching If-None-Match with 304"""
+        url = f"{self.api_base}/location/states"
+        response = requests.get(url, headers={"Accept-Encoding": "identity"})
+        assert response.status_code == 200
+        etag = response.headers.get("ETag")
+        assert etag
+        assert "max-age" in response.headers.get("Cache-Control", "")
+        
+        for if_none_match in [etag, f"W/{etag}", "*"]:
+            response = requests.get(url, headers={"Accept-Encoding": "identity", "If-None-Match": if_none_match})
+            assert response.status_code == 304, if_none_match
+            assert response.content == b""
+        
+        # A tag for another encoding is not a match
+        br_etag = requests.get(url, headers={"Accept-Encoding": "br"}).headers["ETag"]
+        response = requests.get(url, headers={"Accept-Encoding": "gzip", "If-None-Match": br_etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != br_etag
+        assert response.json()["success"] is True
+    
+    def test_location_state_details_encodings(self):
+        """Test state details decode to the same JSON with identity, gzip and br encoding"""
+        decoders = {"identity": lambda body: body, "gzip": gzip.decompress, "br": brotli.decompress}
+        
+        for code in ["RI", "TX"]:
+            url = f"{self.api_base}/location/states/{code}"
+            expected = None
+            # The first request of each state is streamed, later ones come from the cache
+            for encoding in ["identity", "gzip", "br", "identity", "gzip", "br"]:
+                response = requests.get(url, headers={"Accept-Encoding": encoding}, stream=True)
+                assert response.status_code == 200
+                assert response.headers.get("Content-Encoding", "identity") == encoding
+                
+                data = json.loads(decoders[encoding](response.raw.read(decode_content=False)))
+                assert data["success"] is True
+                if expected is None:
+                    expected = data
+                assert data == expected, (code, encoding)
+    
+    def test_location_cache_ignores_unrelated_arguments(self):
+        """Test cached endpoints share one entry across unrelated query arguments"""
+        url = f"{self.api_base}/location/states/RI"
+        headers = {"Accept-Encoding": "identity"}
+        response = requests.get(url, headers=headers)
+        assert response.status_code == 200
+        
+        # Uncached state details are streamed without an ETag, so a tagged response
+        # to a fresh cache buster was served from the entry cached above
+        buster = requests.get(f"{url}?_={time.time()}", headers=headers)
+        assert buster.status_code == 200
+        assert buster.headers.get("ETag")
+        assert buster.content == requests.get(url, headers=headers).content
+    
     def test_api_error_handling(self):
         """Test API error handling for malformed requests"""
         # Test with invalid JSON in request body (if applicable)
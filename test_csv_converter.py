@@ -272,6 +272,39 @@ class TestCSVConverter:
         
         conn.close()
     
+    def test_converter_rolls_back_failed_load(self):
+        """Test that a load failing mid-file reports the real error and leaves no partial data"""
+        test_csv_path = os.path.join(self.test_dir, "bad_encoding.csv")
+        
+        # Invalid UTF-8 after more than one insert batch
+        with open(test_csv_path, 'wb') as f:
+            f.write(b"Name,Age\n")
+            f.write(b"".join(b"Person %d,%d\n" % (i, i % 90) for i in range(20000)))
+            f.write(b"Bad \xff\xfe name,40\n")
+        
+        db_path = os.path.join(self.test_dir, "test_bad_encoding.db")
+        
+        # Run the converter
+        result = subprocess.run([
+            sys.executable, self.converter_script, db_path, test_csv_path
+        ], capture_output=True, text=True)
+        
+        # The decode error is reported, not a follow-up SQLite error
+        assert result.returncode != 0
+        assert "can't decode" in result.stdout, result.stdout
+        assert "Safety level" not in result.stdout
+        
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        
+        # No rows were committed and the journal mode was restored
+        cursor.execute("SELECT COUNT(*) FROM bad_encoding")
+        assert cursor.fetchone()[0] == 0
+        cursor.execute("PRAGMA journal_mode")
+        assert cursor.fetchone()[0] == "delete"
+        
+        conn.close()
+    
     def test_converter_error_handling(self):
         """Test converter error handling for invalid inputs"""
         # Test with non-existent file
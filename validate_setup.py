@@ -11,6 +11,15 @@ import sqlite3
 import requests
 import time
 
+# Tables built by `make prepare-db` (DERIVED_TABLES in api/index.py)
+DERIVED_TABLES = [
+    "zip_county_fts",
+    "zip_county_trigram",
+    "county_health_score",
+    "analytics_state_distribution",
+    "analytics_city_summary",
+    "analytics_health_by_state",
+]
 
 def check_python_version():
     """Check Python version"""
@@ -68,6 +77,13 @@ def check_database():
                 print(f"❌ Table {table} - Missing")
                 return False
         
+        for table in DERIVED_TABLES:
+            if table in tables:
+                print(f"✅ Table {table} - Found")
+            else:
+                print(f"❌ Table {table} - Missing. Run make prepare-db")
+                return False
+        
         # Check data exists
         cursor.execute("SELECT COUNT(*) FROM county_health_rankings")
         health_count = cursor.fetchone()[0]
@@ -210,6 +226,7 @@ def main():
         print("\nCommon fixes:")
         print("  1. Install dependencies: pip install -r test_requirements.txt")
         print("  2. Populate database: python csv_to_sqlite.py data.db county_health_rankings.csv")
+        print("     then: make prepare-db")
         print("  3. Start API: python api/index.py")
     
     return all_passed